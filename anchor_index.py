@@ -0,0 +1,68 @@
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+from link import Link
+
+
+class AnchorIndex:
+    """
+    A shared index of the fragment targets (element ids and anchor names) of every parsed page.
+
+    Fragment links are checked against the index once their page has been parsed. Links to a page
+    that was not parsed yet are kept pending and resolved when the page arrives.
+    """
+
+    ALWAYS_VALID_FRAGMENTS = {"", "top"}
+
+    def __init__(self):
+        self.anchors: Dict[str, FrozenSet[str]] = dict()
+        self.pending: Dict[str, List[tuple[Link, str]]] = dict()
+        self.checked_urls: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def add_page(self, page_url: str, anchors: Iterable[str]) -> List[tuple[Link, str]]:
+        """
+        Store the anchors of a parsed page.
+
+        Args:
+            page_url: The fragment-less URL of the page.
+            anchors: The ids and anchor names found on the page.
+
+        Returns:
+            Pending fragment links to this page whose fragment does not exist, with the fragment.
+        """
+        page_anchors = frozenset(anchors)
+        with self.lock:
+            self.anchors[page_url] = page_anchors
+            pending = self.pending.pop(page_url, [])
+        return [(link, fragment) for link, fragment in pending if fragment not in page_anchors]
+
+    def check(self, page_url: str, fragment: str, link: Link) -> bool | None:
+        """
+        Check that a fragment exists on a page.
+
+        Args:
+            page_url: The fragment-less URL of the page.
+            fragment: The fragment to look for.
+            link: The fragment link, kept pending if the page was not parsed yet.
+
+        Returns:
+            True or False if the page was already parsed, None if the check was deferred.
+            A fragment link that was already checked is reported as valid so it is reported only once.
+        """
+        if fragment.lower() in self.ALWAYS_VALID_FRAGMENTS:
+            return True
+        with self.lock:
+            if link.url in self.checked_urls:
+                return True
+            self.checked_urls.add(link.url)
+            page_anchors = self.anchors.get(page_url)
+            if page_anchors is None:
+                self.pending.setdefault(page_url, []).append((link, fragment))
+                return None
+        return fragment in page_anchors
+
+    def get_unresolved_num(self) -> int:
+        """Return the number of fragment links whose page was never parsed."""
+        with self.lock:
+            return sum(len(links) for links in self.pending.values())
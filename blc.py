@@ -3,7 +3,13 @@ import sys
 from report_factory import ReportType
 
 from loguru import logger
-from broken_links_crawler import BrokenLinksCrawler, get_email_modes, get_report_types
+from crawl_server import JobManager, serve
+from crawler_resources import CrawlerResources
+from host_latency import LatencyTracker
+from parse_cache import ParseCache
+from recheck import recheck
+from broken_links_crawler import BrokenLinksCrawler, EmailParams, get_email_modes, get_report_types, \
+    render_stored_results
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -13,7 +19,10 @@ def parse_arguments() -> argparse.Namespace:
     Returns:
         Parsed arguments as a namespace.
     """
-    parser = argparse.ArgumentParser(description="Crawl and find broken links on a website")
+    parser = argparse.ArgumentParser(description="Crawl and find broken links on a website",
+                                     epilog="Run 'blc report -h' to generate reports from a previous crawl, "
+                                            "'blc recheck -h' to check the findings of a report again "
+                                            "or 'blc serve -h' to run a crawl server.")
 
     parser.add_argument("url", help="A website URL to crawl")
     parser.add_argument("-t", "--threads", type=int, default=-1, help="Number of threads to execute in parallel")
@@ -31,6 +40,8 @@ def parse_arguments() -> argparse.Namespace:
                         help="Change the json report file name from report.json")
     parser.add_argument("--html_report", default="report.html",
                         help="Change the html report file name from report.html")
+    parser.add_argument("--html_summary_report", default="report_summary.html",
+                        help="Change the html summary report, the one sent by email, file name from report_summary.html")
     parser.add_argument("--email_to", type=str, help="Destination email address for sending report")
     parser.add_argument( "--email_mode", choices=get_email_modes(), default="always",
                          help="When to send the report via email")
@@ -38,12 +49,207 @@ def parse_arguments() -> argparse.Namespace:
                          help="What type of report to send via email")
     parser.add_argument("--email_config", type=str, default="email_config.json",
                         help="Path to the email configuration JSON file.")
+    parser.add_argument("--queue_memory_size", type=int, default=-1,
+                        help="Maximum number of pending URLs kept in memory, the rest are spilled to disk")
+    parser.add_argument("--non_crawling_list", action="append", default=[],
+                        help="Additional JSON or plain text (one domain per line) list of URLs not to crawl")
+    parser.add_argument("--max_host_connections", type=int, default=-1,
+                        help="Maximum number of concurrent connections to a single host, the number of threads by "
+                             "default")
+    parser.add_argument("--results_db", default="results.db",
+                        help="Change the crawl results file name from results.db")
+    parser.add_argument("--parse_cache_size", type=int, default=-1,
+                        help="Maximum number of parsed pages cached in memory by content hash")
+    parser.add_argument("--parse_cache_file", type=str,
+                        help="If set, parsed pages are also cached in this file and reused by later crawls")
+    parser.add_argument("--skip_soft_404", action="store_true",
+                        help="If set, error pages served with status 200 are not detected")
+    parser.add_argument("--max_time", type=float, default=-1,
+                        help="Stop crawling after this number of seconds and report what was found. "
+                             "When a budget is set, the most important URLs are crawled first")
+    parser.add_argument("--max_requests", type=int, default=-1,
+                        help="Stop crawling after this number of URLs and report what was found")
+    parser.add_argument("--max_timeout", type=float, default=-1,
+                        help="Maximum duration in seconds of a single request. Below it, each host gets a timeout "
+                             "derived from its observed latency")
+    parser.add_argument("--hedge_requests", action="store_true",
+                        help="If set, a request slower than the host's usual p95 latency is sent again "
+                             "and the first answer is used")
+    parser.add_argument("--max_urls_per_pattern", type=int, default=-1,
+                        help="Number of internal pages of a pattern, such as /calendar/{n}/{n} or /search?color&size, "
+                             "parsed before its pages are only sampled. The other URLs are still checked but not "
+                             "parsed. 0 parses every page")
+    parser.add_argument("--max_urls_per_host", type=int, default=-1,
+                        help="Maximum number of internal pages parsed on a host, the other URLs are only checked")
     parser.add_argument("--test_mode", action="store_true",
                         help="If set, all log prints will be removed for a special log print.")
 
     return parser.parse_args()
 
 
+def parse_report_arguments(argv: list[str]) -> argparse.Namespace:
+    """
+    Parse the arguments of the `report` command.
+
+    Args:
+        argv: Command-line arguments following the command name.
+
+    Returns:
+        Parsed arguments as a namespace.
+    """
+    parser = argparse.ArgumentParser(prog="blc report",
+                                     description="Generate reports from the stored results of a previous crawl")
+
+    parser.add_argument("--results_db", default="results.db", help="The crawl results file to generate reports from")
+    parser.add_argument("--report_types", nargs="+", choices=get_report_types(), default=get_report_types(),
+                        help="Types of reports to generate")
+    parser.add_argument("-v", "--log_verbosity",
+                        choices=["none", "trace", "debug", "info", "success", "warning", "error", "critical"],
+                        default="none", help="Log verbosity level")
+    parser.add_argument("--log_file", default="blc.log", help="Change the log file name from blc.log")
+    parser.add_argument("--text_report", default="report.txt",
+                        help="Change the text report file name from report.txt")
+    parser.add_argument("--json_report", default="report.json",
+                        help="Change the json report file name from report.json")
+    parser.add_argument("--html_report", default="report.html",
+                        help="Change the html report file name from report.html")
+    parser.add_argument("--html_summary_report", default="report_summary.html",
+                        help="Change the html summary report, the one sent by email, file name from report_summary.html")
+    parser.add_argument("--email_to", type=str, help="Destination email address for sending report")
+    parser.add_argument("--email_type", choices=get_report_types(), default="html",
+                        help="What type of report to send via email")
+
+    return parser.parse_args(argv)
+
+
+def report_main(argv: list[str]) -> None:
+    """Entry point for the `report` command."""
+    args = parse_report_arguments(argv)
+
+    set_log_level(args.log_verbosity, args.log_file, False, False)
+
+    names = {
+        ReportType.HUMAN.value: args.text_report,
+        ReportType.JSON.value: args.json_report,
+        ReportType.HTML.value: args.html_report,
+        ReportType.HTML_SUMMARY.value: args.html_summary_report,
+    }
+    report_types = list(args.report_types)
+    report_names = [names[report_type] for report_type in report_types]
+    email_params = EmailParams("always", args.email_to, args.email_type, report_types, report_names, names)
+
+    render_stored_results(args.results_db, report_types, report_names, email_params)
+
+
+def parse_serve_arguments(argv: list[str]) -> argparse.Namespace:
+    """
+    Parse the arguments of the `serve` command.
+
+    Args:
+        argv: Command-line arguments following the command name.
+
+    Returns:
+        Parsed arguments as a namespace.
+    """
+    parser = argparse.ArgumentParser(prog="blc serve",
+                                     description="Run a long-lived crawl server accepting jobs over a local HTTP API")
+
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8600, help="Port to listen on")
+    parser.add_argument("--max_workers", type=int, default=-1,
+                        help="Maximum number of crawling threads shared by all the running jobs")
+    parser.add_argument("-v", "--log_verbosity",
+                        choices=["none", "trace", "debug", "info", "success", "warning", "error", "critical"],
+                        default="none", help="Log verbosity level")
+    parser.add_argument("--log_file", default="blc.log", help="Change the log file name from blc.log")
+    parser.add_argument("--log_display", action="store_true",
+                        help="If set log will be printed also to stdout")
+    parser.add_argument("--non_crawling_list", action="append", default=[],
+                        help="Additional JSON or plain text (one domain per line) list of URLs not to crawl")
+    parser.add_argument("--max_host_connections", type=int, default=-1,
+                        help="Maximum number of concurrent connections to a single host, the worker budget by "
+                             "default")
+    parser.add_argument("--parse_cache_size", type=int, default=-1,
+                        help="Maximum number of parsed pages cached in memory by content hash")
+    parser.add_argument("--skip_soft_404", action="store_true",
+                        help="If set, error pages served with status 200 are not detected")
+    parser.add_argument("--max_timeout", type=float, default=-1,
+                        help="Maximum duration in seconds of a single request")
+    parser.add_argument("--hedge_requests", action="store_true",
+                        help="If set, a request slower than the host's usual p95 latency is sent again")
+
+    return parser.parse_args(argv)
+
+
+def serve_main(argv: list[str]) -> None:
+    """Entry point for the `serve` command."""
+    args = parse_serve_arguments(argv)
+
+    set_log_level(args.log_verbosity, args.log_file, args.log_display, False)
+
+    max_workers = args.max_workers if args.max_workers != -1 else JobManager.DEFAULT_MAX_WORKERS
+    resources = CrawlerResources(
+        non_crawling_files=args.non_crawling_list,
+        max_host_connections=args.max_host_connections if args.max_host_connections != -1 else max_workers,
+        parse_cache=ParseCache(args.parse_cache_size if args.parse_cache_size != -1 else ParseCache.DEFAULT_SIZE),
+        detect_soft_404=not args.skip_soft_404,
+        max_timeout=args.max_timeout if args.max_timeout != -1 else LatencyTracker.DEFAULT_MAX_TIMEOUT,
+        hedge_requests=args.hedge_requests
+    )
+    manager = JobManager(resources, max_workers)
+    serve(args.host, args.port, manager)
+
+
+def parse_recheck_arguments(argv: list[str]) -> argparse.Namespace:
+    """
+    Parse the arguments of the `recheck` command.
+
+    Args:
+        argv: Command-line arguments following the command name.
+
+    Returns:
+        Parsed arguments as a namespace.
+    """
+    parser = argparse.ArgumentParser(prog="blc recheck",
+                                     description="Check again only the findings of a previous JSON report")
+
+    parser.add_argument("report", help="A JSON report of a previous crawl")
+    parser.add_argument("-t", "--threads", type=int, default=-1, help="Number of threads to execute in parallel")
+    parser.add_argument("--output", default="recheck.json",
+                        help="Change the recheck report file name from recheck.json")
+    parser.add_argument("--verify_referrers", action="store_true",
+                        help="If set, also check that the pages the findings appeared in still link to them")
+    parser.add_argument("-v", "--log_verbosity",
+                        choices=["none", "trace", "debug", "info", "success", "warning", "error", "critical"],
+                        default="none", help="Log verbosity level")
+    parser.add_argument("--log_file", default="blc.log", help="Change the log file name from blc.log")
+    parser.add_argument("--log_display", action="store_true",
+                        help="If set log will be printed also to stdout")
+
+    return parser.parse_args(argv)
+
+
+def recheck_main(argv: list[str]) -> None:
+    """Entry point for the `recheck` command."""
+    args = parse_recheck_arguments(argv)
+
+    set_log_level(args.log_verbosity, args.log_file, args.log_display, False)
+
+    threads_num = args.threads if args.threads != -1 else BrokenLinksCrawler.DEFAULT_THREADS_NUM
+    report = recheck(args.report, args.output, threads_num, args.verify_referrers)
+    if report:
+        summary = report["summary"]
+        print(f"Fixed: {summary['fixed']}  |  Still broken: {summary['still_broken']}  |  "
+              f"Changed: {summary['changed']}  |  Report: {args.output}")
+
+
+COMMANDS = {
+    "report": report_main,
+    "serve": serve_main,
+    "recheck": recheck_main,
+}
+
+
 def set_log_level(log_level: str, file_name: str, log_to_screen: bool, test_mode: bool) -> None:
     """
     Set the log level and output destination.
@@ -88,12 +294,16 @@ def set_log_level(log_level: str, file_name: str, log_to_screen: bool, test_mode
 
 def main() -> None:
     """Entry point for the CLI application."""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
     args = parse_arguments()
 
     set_log_level(args.log_verbosity, args.log_file, args.log_display, args.test_mode)
 
     report_types = get_report_types()
-    report_names = [args.text_report, args.json_report, args.html_report]
+    report_names = [args.text_report, args.json_report, args.html_report, args.html_summary_report]
 
     crawler = BrokenLinksCrawler(
         target_url=args.url,
@@ -105,7 +315,20 @@ def main() -> None:
         email_mode=args.email_mode,
         email_to=args.email_to,
         email_type=args.email_type,
-        test_mode=args.test_mode
+        test_mode=args.test_mode,
+        queue_memory_size=args.queue_memory_size,
+        non_crawling_files=args.non_crawling_list,
+        max_host_connections=args.max_host_connections,
+        results_db=args.results_db,
+        parse_cache_size=args.parse_cache_size,
+        parse_cache_file=args.parse_cache_file,
+        detect_soft_404=not args.skip_soft_404,
+        max_time=args.max_time,
+        max_requests=args.max_requests,
+        max_timeout=args.max_timeout,
+        hedge_requests=args.hedge_requests,
+        max_urls_per_pattern=args.max_urls_per_pattern,
+        max_urls_per_host=args.max_urls_per_host
     )
     crawler.start()
 
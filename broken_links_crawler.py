@@ -1,14 +1,21 @@
+import json
+import os
 import threading
 from datetime import datetime
 from time import sleep
-from typing import List
+from typing import List, Optional
 
 from loguru import logger
 
 from crawler import Crawler
+from crawler_resources import CrawlerResources
 from email_report_sender import EmailReportSender, EmailMode
+from host_latency import LatencyTracker
 from link import Link, LinkStatus
+from parse_cache import ParseCache
 from report_factory import ReportFactory, ReportType
+from result_store import ResultStore
+from trap_detector import TrapDetector
 from worker_manager import WorkerManager
 
 
@@ -20,24 +27,41 @@ def get_report_types():
     return [t.value for t in ReportType]
 
 
+DEFAULT_REPORT_NAMES = {
+    ReportType.HUMAN.value: "report.txt",
+    ReportType.JSON.value: "report.json",
+    ReportType.HTML.value: "report.html",
+    ReportType.HTML_SUMMARY.value: "report_summary.html",
+}
+
+
 class EmailParams:
-    def __init__(self, email_mode, email_to, email_type, report_types, report_names):
+    def __init__(self, email_mode, email_to, email_type, report_types, report_names, names_by_type=None):
+        """
+        Args:
+            names_by_type: File name of each report type, used when the emailed report must be added to
+                report_types, DEFAULT_REPORT_NAMES is used for the types missing from it.
+        """
         self.sender = None
         self.mode = None
         self.report_type = None
 
         if email_to:
+            if email_type == ReportType.HTML.value:
+                # The full HTML report needs scripts and can be very large, emails get the bounded summary.
+                email_type = ReportType.HTML_SUMMARY.value
             self.sender = EmailReportSender(email_to, email_type)
             self.mode = email_mode
             self.report_type = email_type
             if email_type not in report_types:
                 report_types.append(email_type)
-                report_names.append(f"report.{email_type}")
+                report_names.append({**DEFAULT_REPORT_NAMES, **(names_by_type or {})}[email_type])
                 logger.info(f"Adding {email_type} report to the list of reports to generate.")
 
 
 class BrokenLinksCrawler:
     DEFAULT_THREADS_NUM = 20
+    CHECKPOINT_INTERVAL = 10
 
     def __init__(
         self,
@@ -50,7 +74,21 @@ class BrokenLinksCrawler:
         email_mode: EmailMode,
         email_to: str,
         email_type: ReportType,
-        test_mode: bool = False
+        test_mode: bool = False,
+        queue_memory_size: int = -1,
+        non_crawling_files: List[str] = (),
+        max_host_connections: int = -1,
+        results_db: Optional[str] = ResultStore.DEFAULT_PATH,
+        parse_cache_size: int = -1,
+        parse_cache_file: Optional[str] = None,
+        detect_soft_404: bool = True,
+        max_time: float = -1,
+        max_requests: int = -1,
+        max_timeout: float = -1,
+        hedge_requests: bool = False,
+        max_urls_per_pattern: int = -1,
+        max_urls_per_host: int = -1,
+        resources: Optional[CrawlerResources] = None
     ):
         self.email_params = EmailParams(email_mode, email_to, email_type, report_types, report_names)
 
@@ -58,15 +96,44 @@ class BrokenLinksCrawler:
         self.crawlers_num = crawlers_num if crawlers_num != -1 else self.DEFAULT_THREADS_NUM
         self.max_depth = max_depth if max_depth != -1 else float("inf")
 
-        self.crawler = Crawler(self.target_url, self.max_depth)
+        self.owns_resources = resources is None
+        if resources is None:
+            # Every thread may request the same host, fewer connections would leave threads waiting for one.
+            max_host_connections = max_host_connections if max_host_connections != -1 else self.crawlers_num
+            parse_cache = ParseCache(parse_cache_size if parse_cache_size != -1 else ParseCache.DEFAULT_SIZE,
+                                     parse_cache_file)
+            resources = CrawlerResources(non_crawling_files, max_host_connections, parse_cache, detect_soft_404,
+                                         max_timeout if max_timeout != -1 else LatencyTracker.DEFAULT_MAX_TIMEOUT,
+                                         hedge_requests)
+
+        self.result_store = None
+        previously_broken_urls = set()
+        if results_db:
+            self.result_store = ResultStore(results_db)
+            previously_broken_urls = self.result_store.load_finding_urls()
+        # Numbers of broken links, fetch error links, URLs and edges already in the result store.
+        self.saved_sizes = (0, 0, 0, 0)
+        self.stop_checkpoints = threading.Event()
+
+        max_urls_per_pattern = (max_urls_per_pattern if max_urls_per_pattern != -1
+                                else TrapDetector.DEFAULT_MAX_URLS_PER_PATTERN)
+        trap_detector = (TrapDetector(max_urls_per_pattern, max_urls_per_host if max_urls_per_host != -1 else None)
+                         if max_urls_per_pattern else None)
+        self.crawler = Crawler(self.target_url, self.max_depth, resources, trap_detector)
+        self.crawler.previously_broken_urls = previously_broken_urls
         self.broken_links = self.crawler.get_broken_links()
         self.other_error_links = self.crawler.get_other_error_links()
 
+        self.max_time = max_time if max_time != -1 else None
+        self.max_requests = max_requests if max_requests != -1 else None
+        self.budget_mode = self.max_time is not None or self.max_requests is not None
+
         self.report_types = report_types
         self.report_names = report_names
         self.silent = silent
 
         self.start_time = datetime.now()
+        self.execution_time = ""
         self.stop_live_display = False
 
         first_link = Link(self.target_url, 0, 'target_url', LinkStatus.NOT_VISITED)
@@ -74,12 +141,25 @@ class BrokenLinksCrawler:
             first_task=first_link,
             processor=self.crawler,
             repeat_task=False,
-            threads_num=self.crawlers_num
+            threads_num=self.crawlers_num,
+            queue_memory_size=queue_memory_size if queue_memory_size != -1 else WorkerManager.DEFAULT_QUEUE_MEMORY_SIZE,
+            priority_fn=self.crawler.priority if self.budget_mode else None,
+            max_time=self.max_time,
+            max_requests=self.max_requests,
+            new_task_fn=self.crawler.limit_traps if trap_detector else None
         )
 
         self.test_mode = test_mode
 
-    def start(self) -> None:
+    def crawl(self) -> None:
+        """Crawl the target and collect the findings, without generating reports."""
+        self.start_time = datetime.now()
+        if self.result_store:
+            # The previous crawl is replaced only now, and what this one finds is committed as it goes.
+            self.result_store.reset()
+            self.save_results(finished=False)
+            checkpoint_thread = threading.Thread(target=self.checkpoint, daemon=True, name="Checkpoint")
+            checkpoint_thread.start()
         self.crawlers_manager.start()
 
         if not self.silent:
@@ -94,19 +174,69 @@ class BrokenLinksCrawler:
 
         self.broken_links = self.crawler.get_broken_links()
         self.other_error_links = self.crawler.get_other_error_links()
+        self.crawler.attach_referrers(self.broken_links + self.other_error_links)
+        self.execution_time = self.get_time_delta()
+        if self.result_store:
+            self.stop_checkpoints.set()
+            checkpoint_thread.join()
+            self.save_results(finished=True)
+        if self.owns_resources:
+            self.crawler.resources.close()
+
+    def cancel(self) -> None:
+        """Stop crawling, the findings collected so far are kept."""
+        self.crawlers_manager.stop()
+
+    def render_report(self, report_type: str) -> str:
+        """
+        Render a report of the crawl.
+
+        Args:
+            report_type: One of the ReportType values.
+
+        Returns:
+            The report body.
+        """
+        report = ReportFactory.create_report(report_type)
+        return report.generate(self.target_url, self.broken_links, self.other_error_links, self.execution_time,
+                               self.crawlers_manager.get_tasks_num(), self.crawlers_num, self.get_run_stats())
+
+    def start(self) -> None:
+        self.crawl()
 
         if self.test_mode:
             logger.critical(
-                f"{self.target_url},{self.max_depth},{self.crawlers_num},{self.get_time_delta()},"
+                f"{self.target_url},{self.max_depth},{self.crawlers_num},{self.execution_time},"
                 f"{len(self.broken_links)},{len(self.other_error_links)},{self.crawlers_manager.get_processed_num()},"
                 f"{self.crawlers_manager.get_tasks_num()}")
         else:
             msg = (
-                f"Crawling Time: {self.get_time_delta()}  |  "
+                f"Crawling Time: {self.execution_time}  |  "
                 f"Broken_URLs+fetch_error_URLs/Visited_URLs/Found_URLs: {len(self.broken_links)}+{len(self.other_error_links)}/"
                 f"{self.crawlers_manager.get_processed_num()}/{self.crawlers_manager.get_tasks_num()}"
             )
             logger.info(f"{msg}")
+            connection_stats = self.crawler.get_connection_stats()
+            logger.info(
+                f"Connections: {connection_stats['connections']} opened for {connection_stats['requests']} requests "
+                f"({connection_stats['reused']} reused)"
+            )
+            parse_cache_stats = self.crawler.get_parse_cache_stats()
+            logger.info(f"Parse cache: {parse_cache_stats['hits']} hits, {parse_cache_stats['misses']} misses")
+            external_stats = self.crawler.get_external_link_cache_stats()
+            logger.info(f"External link cache: {external_stats['hits']} hits, {external_stats['misses']} misses")
+            latency_stats = self.crawler.get_latency_stats()
+            logger.info(f"Latency: p50 {latency_stats['p50']:.3f}s, p99 {latency_stats['p99']:.3f}s over "
+                        f"{latency_stats['hosts']} hosts, {latency_stats['timeouts']} timeouts, "
+                        f"{latency_stats['hedged']} hedged requests ({latency_stats['hedge_wins']} won by the hedge)")
+            redirect_stats = self.crawler.get_redirect_stats()
+            logger.info(f"Redirect cache: {redirect_stats['chains']} chains, {redirect_stats['rules']} prefix rules, "
+                        f"{redirect_stats['rewrites']} URLs rewritten")
+            trap_stats = self.crawler.get_trap_stats()
+            logger.info(f"URL patterns: {trap_stats['patterns']} seen, {trap_stats['suppressed_patterns']} over budget, "
+                        f"{trap_stats['suppressed_urls']} URLs checked without parsing them")
+            for name, value in self.get_run_stats().items():
+                logger.info(f"{name.replace('_', ' ').title()}: {value}")
             self.generate_reports_and_email()
 
     def get_time_delta(self) -> str:
@@ -145,18 +275,131 @@ class BrokenLinksCrawler:
         self.print_status(header)
         print()
 
+    def get_run_stats(self) -> dict:
+        run_stats = dict()
+        if self.budget_mode:
+            budgets = []
+            if self.max_time is not None:
+                budgets.append(f"{self.max_time} seconds")
+            if self.max_requests is not None:
+                budgets.append(f"{self.max_requests} requests")
+            processed_num = self.crawlers_manager.get_processed_num()
+            tasks_num = self.crawlers_manager.get_tasks_num()
+            run_stats["budget"] = " / ".join(budgets) + (" (exhausted)" if self.crawlers_manager.budget_exhausted
+                                                         else "")
+            run_stats["coverage"] = f"{processed_num}/{tasks_num} URLs visited ({processed_num / tasks_num:.1%})"
+            run_stats["remaining_frontier"] = self.crawlers_manager.get_skipped_num()
+        redirect_rewrites = self.crawler.get_redirect_stats()["rewrites"]
+        if redirect_rewrites:
+            run_stats["redirect_rewrites"] = redirect_rewrites
+        suppressed_urls = self.crawler.get_trap_stats()["suppressed_urls"]
+        if suppressed_urls:
+            # Suppressed URLs were checked, only their pages were not parsed.
+            run_stats["unparsed_urls"] = suppressed_urls
+            run_stats["unparsed_patterns"] = ", ".join(
+                f"{pattern} ({count})" for pattern, count in self.crawler.get_suppressed_patterns().items())
+        return run_stats
+
+    def checkpoint(self) -> None:
+        """Periodically commit the findings to the result store while crawling."""
+        while not self.stop_checkpoints.wait(self.CHECKPOINT_INTERVAL):
+            self.save_results(finished=False)
+
+    def save_results(self, finished: bool) -> None:
+        """
+        Commit the findings and edges found since the last call, and the metadata, to the result store.
+
+        Args:
+            finished: Whether the crawl is over, the store is then closed.
+        """
+        metadata = {
+            "target_url": self.target_url,
+            "execution_time": self.execution_time if finished else self.get_time_delta(),
+            "visited_urls_num": self.crawlers_manager.get_tasks_num(),
+            "processed_urls_num": self.crawlers_manager.get_processed_num(),
+            "threads_num": self.crawlers_num,
+            "max_depth": self.max_depth,
+            "started_at": self.start_time.isoformat(),
+            "run_stats": json.dumps(self.get_run_stats()),
+        }
+        if finished:
+            metadata["finished_at"] = datetime.now().isoformat()
+        referrer_index = self.crawler.referrer_index
+        saved_broken, saved_errors, saved_urls, saved_edges = self.saved_sizes
+        broken_num, errors_num = len(self.broken_links), len(self.other_error_links)
+        urls_num, edges_num = referrer_index.get_sizes()
+        self.result_store.save_edges(referrer_index.urls[saved_urls:urls_num],
+                                     referrer_index.iter_edges(saved_edges, edges_num), saved_urls)
+        self.result_store.save_run(metadata, self.broken_links[saved_broken:broken_num],
+                                   self.other_error_links[saved_errors:errors_num])
+        self.saved_sizes = (broken_num, errors_num, urls_num, edges_num)
+        if finished:
+            self.result_store.close()
+            logger.info(f"Crawl results were stored in {self.result_store.path}.")
+
     def generate_reports_and_email(self):
-        execution_time = self.get_time_delta()
-        visited_urls_num = self.crawlers_manager.get_tasks_num()
-
-        for report_type, report_name in zip(self.report_types, self.report_names):
-            report = ReportFactory.create_report(report_type)
-            with open(report_name, "w") as f:
-                report_body = report.generate(self.target_url, self.broken_links, self.other_error_links, execution_time,
-                                              visited_urls_num, self.crawlers_num)
-                f.write(report_body)
-            logger.info(f"Report {report_name} generated.")
-
-            if self.email_params.sender and ((self.email_params.mode == "errors" and self.broken_links)
-                                             or self.email_params.mode == "always") and self.email_params.report_type == report_type:
-                self.email_params.sender.send_email_report(report_name)
+        generate_reports_and_email(self.target_url, self.broken_links, self.other_error_links, self.execution_time,
+                                   self.crawlers_manager.get_tasks_num(), self.crawlers_num, self.report_types,
+                                   self.report_names, self.email_params, self.get_run_stats())
+
+
+def generate_reports_and_email(
+    target_url: str,
+    broken_links: List[Link],
+    other_error_links: List[Link],
+    execution_time: str,
+    visited_urls_num: int,
+    crawlers_num: int,
+    report_types: List[str],
+    report_names: List[str],
+    email_params: EmailParams,
+    run_stats: Optional[dict] = None
+) -> None:
+    for report_type, report_name in zip(report_types, report_names):
+        report = ReportFactory.create_report(report_type)
+        with open(report_name, "w") as f:
+            report_body = report.generate(target_url, broken_links, other_error_links, execution_time,
+                                          visited_urls_num, crawlers_num, run_stats)
+            f.write(report_body)
+        logger.info(f"Report {report_name} generated.")
+
+        if email_params.sender and ((email_params.mode == "errors" and broken_links)
+                                    or email_params.mode == "always") and email_params.report_type == report_type:
+            email_params.sender.send_email_report(report_name)
+
+
+def render_stored_results(
+    results_db: str,
+    report_types: List[str],
+    report_names: List[str],
+    email_params: EmailParams
+) -> None:
+    """
+    Generate reports, and optionally email them, from the results of a previous crawl.
+
+    Args:
+        results_db: Path to the result store written by the crawl.
+        report_types: Types of reports to generate.
+        report_names: File names of the reports.
+        email_params: Email parameters.
+    """
+    if not os.path.exists(results_db):
+        raise FileNotFoundError(f"Results file '{results_db}' not found.")
+
+    store = ResultStore(results_db)
+    try:
+        metadata = store.load_metadata()
+        broken_links = store.load_links(ResultStore.BROKEN)
+        other_error_links = store.load_links(ResultStore.FETCH_ERROR)
+    finally:
+        store.close()
+
+    if "target_url" not in metadata:
+        raise ValueError(f"Results file '{results_db}' does not contain a crawl.")
+    if "finished_at" not in metadata:
+        logger.warning(f"The crawl stored in '{results_db}' did not finish, the reports cover what it found "
+                       f"before it stopped.")
+
+    generate_reports_and_email(metadata["target_url"], broken_links, other_error_links, metadata["execution_time"],
+                               int(metadata["visited_urls_num"]), int(metadata["threads_num"]), report_types,
+                               report_names, email_params, json.loads(metadata.get("run_stats", "{}")))
@@ -0,0 +1,118 @@
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+pool_waits = threading.local()
+
+
+def get_pool_wait() -> float:
+    """Return the seconds the current thread has spent waiting for a free connection to a host so far."""
+    return getattr(pool_waits, "seconds", 0.0)
+
+
+class PoolWaitMixin:
+    """Adds the time spent waiting for a free connection of a blocking pool to the wait of the current thread."""
+
+    def _get_conn(self, timeout=None):
+        start = time.monotonic()
+        try:
+            return super()._get_conn(timeout)
+        finally:
+            pool_waits.seconds = get_pool_wait() + time.monotonic() - start
+
+
+class TimedHTTPConnectionPool(PoolWaitMixin, HTTPConnectionPool):
+    pass
+
+
+class TimedHTTPSConnectionPool(PoolWaitMixin, HTTPSConnectionPool):
+    pass
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """An HTTP adapter with TCP keep-alive that keeps connection statistics of evicted host pools."""
+
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+    def __init__(self, *args, **kwargs):
+        self.evicted_requests = 0
+        self.evicted_connections = 0
+        self.stats_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault("socket_options", self.SOCKET_OPTIONS)
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager.pools.dispose_func = self._dispose_pool
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+    def _dispose_pool(self, pool) -> None:
+        with self.stats_lock:
+            self.evicted_requests += pool.num_requests
+            self.evicted_connections += pool.num_connections
+        pool.close()
+
+    def get_stats(self) -> tuple[int, int]:
+        """Return the number of requests sent and connections opened by this adapter."""
+        pools = self.poolmanager.pools
+        live_pools = [pools.get(key) for key in pools.keys()]
+        with self.stats_lock:
+            requests_num = self.evicted_requests
+            connections_num = self.evicted_connections
+        for pool in live_pools:
+            if pool is not None:
+                requests_num += pool.num_requests
+                connections_num += pool.num_connections
+        return requests_num, connections_num
+
+
+class SharedTransport:
+    """
+    A single requests session shared by all the worker threads.
+
+    Connections are kept alive and reused across threads, and the number of concurrent connections
+    to each host is capped. Threads wait for a free connection instead of opening a new one.
+    """
+
+    DEFAULT_MAX_HOST_CONNECTIONS = 20
+    MAX_CACHED_HOSTS = 100
+
+    def __init__(self, user_agent: str, max_host_connections: int = DEFAULT_MAX_HOST_CONNECTIONS):
+        """
+        Initialize the shared transport.
+
+        Args:
+            user_agent: The User-Agent header sent with every request.
+            max_host_connections: Maximum number of concurrent connections to a single host.
+        """
+        self.adapter = PooledHTTPAdapter(
+            pool_connections=self.MAX_CACHED_HOSTS,
+            pool_maxsize=max_host_connections,
+            pool_block=True
+        )
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": user_agent})
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+    def get_stats(self) -> dict:
+        """
+        Return connection reuse statistics.
+
+        Returns:
+            A dict with the number of requests, opened connections and reused connections.
+        """
+        requests_num, connections_num = self.adapter.get_stats()
+        return {
+            "requests": requests_num,
+            "connections": connections_num,
+            "reused": max(0, requests_num - connections_num),
+        }
+
+    def close(self) -> None:
+        self.session.close()
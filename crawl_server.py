@@ -0,0 +1,324 @@
+import enum
+import itertools
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from loguru import logger
+
+from broken_links_crawler import BrokenLinksCrawler, get_report_types
+from crawler_resources import CrawlerResources
+from report_factory import ReportFactory, ReportType
+
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class JobResult:
+    """
+    What a finished job keeps for its status and reports.
+
+    The crawler is released once the job is over, with its dedup set, frontier, referrer and anchor indexes.
+    """
+
+    def __init__(self, crawler: BrokenLinksCrawler):
+        self.target_url = crawler.target_url
+        self.broken_links = crawler.broken_links
+        self.other_error_links = crawler.other_error_links
+        self.execution_time = crawler.execution_time
+        self.visited_urls = crawler.crawlers_manager.get_processed_num()
+        self.found_urls = crawler.crawlers_manager.get_tasks_num()
+        self.threads_num = crawler.crawlers_num
+        self.run_stats = crawler.get_run_stats()
+
+    def render_report(self, report_type: str) -> str:
+        report = ReportFactory.create_report(report_type)
+        return report.generate(self.target_url, self.broken_links, self.other_error_links, self.execution_time,
+                               self.found_urls, self.threads_num, self.run_stats)
+
+
+class CrawlJob:
+    """A crawl submitted to the server."""
+
+    def __init__(self, job_id: str, target_url: str, threads_num: int, max_depth: int, max_time: float,
+                 max_requests: int):
+        self.id = job_id
+        self.target_url = target_url
+        self.threads_num = threads_num
+        self.max_depth = max_depth
+        self.max_time = max_time
+        self.max_requests = max_requests
+        self.status = JobStatus.QUEUED
+        self.error = ""
+        self.cancel_requested = False
+        self.crawler: Optional[BrokenLinksCrawler] = None
+        self.result: Optional[JobResult] = None
+        self.submitted_at = datetime.now()
+
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.CANCELLED, JobStatus.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "id": self.id,
+            "target_url": self.target_url,
+            "status": self.status.value,
+            "threads": self.threads_num,
+            "submitted_at": self.submitted_at.isoformat(),
+        }
+        if self.result:
+            result.update({
+                "crawling_time": self.result.execution_time,
+                "visited_urls": self.result.visited_urls,
+                "found_urls": self.result.found_urls,
+                "broken_urls": len(self.result.broken_links),
+                "fetch_error_urls": len(self.result.other_error_links),
+            })
+        elif (crawler := self.crawler) and self.status != JobStatus.QUEUED:
+            manager = crawler.crawlers_manager
+            result.update({
+                "crawling_time": crawler.execution_time or crawler.get_time_delta(),
+                "visited_urls": manager.get_processed_num(),
+                "found_urls": manager.get_tasks_num(),
+                "broken_urls": len(crawler.crawler.get_broken_links()),
+                "fetch_error_urls": len(crawler.crawler.get_other_error_links()),
+            })
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class JobManager:
+    """
+    Runs crawl jobs concurrently under a global worker budget.
+
+    All the jobs share the same CrawlerResources, so connections, parsed pages and per-host knowledge
+    stay warm from one job to the next. A job waits until enough workers are free to start.
+    """
+
+    DEFAULT_MAX_WORKERS = 40
+    # Finished jobs kept for their reports, the oldest are forgotten first.
+    MAX_FINISHED_JOBS = 1000
+
+    def __init__(self, resources: CrawlerResources, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.resources = resources
+        self.max_workers = max_workers
+        self.available_workers = max_workers
+        self.jobs: Dict[str, CrawlJob] = dict()
+        self.job_ids = itertools.count(1)
+        self.condition = threading.Condition()
+
+    def submit(self, target_url: str, threads_num: int = -1, max_depth: int = -1, max_time: float = -1,
+               max_requests: int = -1) -> CrawlJob:
+        """
+        Submit a crawl job, it starts as soon as enough workers are free.
+
+        Args:
+            target_url: The website URL to crawl.
+            threads_num: Number of threads, capped by the global worker budget.
+            max_depth: Maximum crawl depth, -1 for unlimited.
+            max_time: Time budget in seconds, -1 for unlimited.
+            max_requests: Requests budget, -1 for unlimited.
+
+        Returns:
+            The submitted job.
+        """
+        threads_num = threads_num if threads_num != -1 else BrokenLinksCrawler.DEFAULT_THREADS_NUM
+        threads_num = max(1, min(threads_num, self.max_workers))
+        with self.condition:
+            job = CrawlJob(str(next(self.job_ids)), target_url, threads_num, max_depth, max_time, max_requests)
+            self.jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job,), name=f"Job-{job.id}", daemon=True).start()
+        logger.info(f"Job {job.id} submitted for {target_url} with {threads_num} threads.")
+        return job
+
+    def _run(self, job: CrawlJob) -> None:
+        with self.condition:
+            self.condition.wait_for(lambda: job.cancel_requested or self.available_workers >= job.threads_num)
+            if job.cancel_requested:
+                job.status = JobStatus.CANCELLED
+                return
+            self.available_workers -= job.threads_num
+
+        try:
+            job.crawler = BrokenLinksCrawler(
+                target_url=job.target_url,
+                report_types=[],
+                report_names=[],
+                silent=True,
+                crawlers_num=job.threads_num,
+                max_depth=job.max_depth,
+                email_mode=None,
+                email_to=None,
+                email_type=None,
+                results_db=None,
+                max_time=job.max_time,
+                max_requests=job.max_requests,
+                resources=self.resources
+            )
+            if job.cancel_requested:
+                job.crawler.cancel()
+            job.status = JobStatus.RUNNING
+            job.crawler.crawl()
+            job.result = JobResult(job.crawler)
+            job.status = JobStatus.CANCELLED if job.cancel_requested else JobStatus.DONE
+            logger.info(f"Job {job.id} {job.status.value} in {job.result.execution_time}.")
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        finally:
+            job.crawler = None
+            with self.condition:
+                self.available_workers += job.threads_num
+                self._forget_old_jobs()
+                self.condition.notify_all()
+
+    def _forget_old_jobs(self) -> None:
+        """Remove the oldest finished jobs over MAX_FINISHED_JOBS, called while holding self.condition."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished()]
+        for job_id in finished[:len(finished) - self.MAX_FINISHED_JOBS]:
+            del self.jobs[job_id]
+
+    def cancel(self, job_id: str) -> Optional[CrawlJob]:
+        job = self.jobs.get(job_id)
+        if job is None or job.is_finished():
+            return job
+        job.cancel_requested = True
+        # The crawler is released as soon as the job finishes.
+        if crawler := job.crawler:
+            crawler.cancel()
+        with self.condition:
+            self.condition.notify_all()
+        return job
+
+    def remove(self, job_id: str) -> Optional[CrawlJob]:
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job and job.is_finished():
+                del self.jobs[job_id]
+            return job
+
+    def get(self, job_id: str) -> Optional[CrawlJob]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[CrawlJob]:
+        with self.condition:
+            return list(self.jobs.values())
+
+
+class CrawlRequestHandler(BaseHTTPRequestHandler):
+    """
+    The job API:
+        POST   /jobs                       submit a job: {"url", "threads", "depth", "max_time", "max_requests"}
+        GET    /jobs                       list the jobs
+        GET    /jobs/<id>                  status of a job
+        GET    /jobs/<id>/report?type=...  report of a finished job, in any ReportFactory format
+        DELETE /jobs/<id>                  cancel a running job, or forget a finished one
+    """
+
+    CONTENT_TYPES = {
+        ReportType.HUMAN.value: "text/plain; charset=utf-8",
+        ReportType.JSON.value: "application/json",
+        ReportType.HTML.value: "text/html; charset=utf-8",
+        ReportType.HTML_SUMMARY.value: "text/html; charset=utf-8",
+    }
+
+    @property
+    def manager(self) -> JobManager:
+        return self.server.manager
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send(self, status: int, body: str, content_type: str = "application/json") -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, value: Any) -> None:
+        self._send(status, json.dumps(value, indent=4))
+
+    def _path_parts(self) -> List[str]:
+        return [part for part in urlparse(self.path).path.split("/") if part]
+
+    def do_POST(self) -> None:
+        if self._path_parts() != ["jobs"]:
+            return self._send_json(404, {"error": "Not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            job = self.manager.submit(
+                params["url"],
+                int(params.get("threads", -1)),
+                int(params.get("depth", -1)),
+                float(params.get("max_time", -1)),
+                int(params.get("max_requests", -1))
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send_json(400, {"error": f"Invalid job: {e}"})
+        self._send_json(201, job.to_dict())
+
+    def do_GET(self) -> None:
+        parts = self._path_parts()
+        if parts == ["jobs"]:
+            return self._send_json(200, [job.to_dict() for job in self.manager.list()])
+        if len(parts) < 2 or parts[0] != "jobs" or (job := self.manager.get(parts[1])) is None:
+            return self._send_json(404, {"error": "Not found"})
+        if len(parts) == 2:
+            return self._send_json(200, job.to_dict())
+        if parts[2:] != ["report"]:
+            return self._send_json(404, {"error": "Not found"})
+
+        report_type = parse_qs(urlparse(self.path).query).get("type", [ReportType.JSON.value])[0]
+        if report_type not in get_report_types():
+            return self._send_json(400, {"error": f"Unknown report type {report_type}"})
+        if job.status not in (JobStatus.DONE, JobStatus.CANCELLED):
+            return self._send_json(409, {"error": f"Job is {job.status.value}"})
+        if job.result is None:
+            return self._send_json(409, {"error": "Job was cancelled before it started"})
+        self._send(200, job.result.render_report(report_type), self.CONTENT_TYPES[report_type])
+
+    def do_DELETE(self) -> None:
+        parts = self._path_parts()
+        if len(parts) != 2 or parts[0] != "jobs" or self.manager.get(parts[1]) is None:
+            return self._send_json(404, {"error": "Not found"})
+        job = self.manager.get(parts[1])
+        job = self.manager.remove(job.id) if job.is_finished() else self.manager.cancel(job.id)
+        self._send_json(200, job.to_dict())
+
+
+def serve(host: str, port: int, manager: JobManager) -> None:
+    """
+    Serve the job API until interrupted.
+
+    Args:
+        host: Interface to listen on.
+        port: Port to listen on.
+        manager: The job manager running the submitted jobs.
+    """
+    server = ThreadingHTTPServer((host, port), CrawlRequestHandler)
+    server.daemon_threads = True
+    server.manager = manager
+    logger.info(f"Serving the crawl job API on http://{host}:{port}")
+    print(f"Serving the crawl job API on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nInterrupted by user.")
+    finally:
+        server.server_close()
+        for job in manager.list():
+            manager.cancel(job.id)
+        manager.resources.close()
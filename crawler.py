@@ -1,10 +1,8 @@
-import json
 import os
-import platform
 import threading
 from collections import defaultdict
 from typing import List, Optional
-from urllib.parse import urlparse, quote, urlunparse
+from urllib.parse import urlparse, quote, urlunparse, urldefrag, unquote
 
 import requests
 import urllib3
@@ -12,8 +10,14 @@ from bs4 import BeautifulSoup
 from loguru import logger
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 
+from anchor_index import AnchorIndex
+from crawler_resources import CrawlerResources
+from host_latency import timed_request
 from link import Link, LinkStatus
+from parse_cache import ParsedPage
 from processor import Processor
+from referrer_index import ReferrerIndex
+from trap_detector import TrapDetector
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -33,11 +37,21 @@ def normalize_url(url: str) -> str:
 
 
 class Crawler(Processor):
-    def __init__(self, target_url: str, max_depth: int):
+    def __init__(self, target_url: str, max_depth: int, resources: Optional[CrawlerResources] = None,
+                 trap_detector: Optional[TrapDetector] = None):
         self.target_url = normalize_url(target_url)
+        # URL prefixes of the crawled site, the URL the target redirects to is added when it is fetched.
+        self.target_urls: tuple[str, ...] = (self.target_url,)
         self.max_depth = max_depth
-        self.sessions = dict()
-        self.non_crawling_domains = self._load_non_crawling_domains()
+        self.resources = resources if resources else CrawlerResources()
+        self.transport = self.resources.transport
+        self.url_filter = self.resources.url_filter
+        self.parse_cache = self.resources.parse_cache
+        self.soft_404_detector = self.resources.soft_404_detector
+        self.redirect_cache = self.resources.redirect_cache
+        self.external_link_cache = self.resources.external_link_cache
+        self.latency_tracker = self.resources.latency_tracker
+        self.previously_broken_urls: set[str] = set()
         self.domain_last_access = dict()
         self.crawl_delays = dict()
         self.robots_parsers = dict()
@@ -46,27 +60,25 @@ class Crawler(Processor):
         self.broken_links_lock = threading.Lock()
         self.other_error_links = []
         self.other_error_links_lock = threading.Lock()
-
-    @staticmethod
-    def _load_non_crawling_domains():
-        try:
-            with open('non_crawling_urls.json', 'r') as f:
-                data = json.load(f)
-                return set(data.get('domains', []))
-        except Exception as e:
-            logger.warning(f"Could not load non-crawling domains list: {e}")
-            return set()
+        self.anchor_index = AnchorIndex()
+        self.referrer_index = ReferrerIndex()
+        self.http_reported_urls: set[str] = set()
+        self.parsed_urls: set[str] = set()
+        self.redirect_rewrites = 0
+        self.redirect_lock = threading.Lock()
+        self.trap_detector = trap_detector
 
     def _is_known_non_crawling(self, url: str) -> bool:
         try:
-            parsed = urlparse(url)
-            hostname = parsed.hostname or ""
-            return any(domain in hostname for domain in self.non_crawling_domains)
+            return self.url_filter.is_excluded(url)
         except Exception as e:
             logger.debug(f"Error parsing URL in _is_known_non_crawling: {e}")
             return False
 
     def add_error_to_report(self, link: Link, error_type: LinkStatus, error: str = '') -> None:
+        if link.status != LinkStatus.NOT_VISITED:
+            # Already reported, e.g. an http link that is also a soft 404, each finding is kept.
+            link = Link(link.url, link.depth, link.first_found_on, redirect_chain=link.redirect_chain)
         link.status = error_type
         link.error = error
         log_fn = logger.error if error_type == LinkStatus.OTHER_ERROR else logger.debug
@@ -84,14 +96,17 @@ class Crawler(Processor):
         retry=retry_if_exception(retry_if_not_404)
     )
     def fetch_url(self, link: Link, session) -> Optional[requests.Response]:
-        url = link.url
+        # Links known to redirect are fetched at the end of their redirect chain.
+        url = link.redirect_chain[-1] if link.redirect_chain else link.url
 
         try:
-            response = session.head(url, verify=False, allow_redirects=True, timeout=10)
+            response = self._request(session, "HEAD", url)
             response.raise_for_status()
             logger.debug(f'Successfully (status {response.status_code}) fetched header: {url}')
+            self._record_redirects(link, response)
 
-            if url.startswith("http://") and response.url.startswith("https://"):
+            if (link.url.startswith("http://") and response.url.startswith("https://")
+                    and self._should_report_http(link.url)):
                 self.add_error_to_report(link, LinkStatus.HTTP_INSTEAD_OF_HTTPS)
 
             content_type = response.headers.get("Content-Type", "")
@@ -99,7 +114,11 @@ class Crawler(Processor):
                 logger.debug(f"Skipping {url} due to non-HTML content type: {content_type}")
                 return None
 
-            if not link.url.startswith(self.target_url):
+            if link.url == self.target_url and response.url != self.target_url:
+                logger.debug(f'The target redirects to {response.url}, its links are internal too.')
+                self.target_urls = (self.target_url, response.url)
+
+            if not link.url.startswith(self.target_urls):
                 logger.debug(f'{link.url} is outside of {self.target_url}, skipping.')
                 return None
 
@@ -107,15 +126,24 @@ class Crawler(Processor):
                 logger.debug(f'Depth limit reached for {link.url}')
                 return None
 
-            response = session.get(url, verify=False)
+            # The redirects were already followed by the HEAD request, get the page they lead to directly.
+            response = self._request(session, "GET", response.url)
             response.raise_for_status()
             logger.debug(f'Page request successful - {response.status_code}')
+
+            # The redirects, if any, were followed by the HEAD request or resolved from the cache.
+            if (self.soft_404_detector and link.url not in self.target_urls and url not in self.target_urls
+                    and self.soft_404_detector.is_soft_404(link.url, response, session, bool(link.redirect_chain))):
+                # Still parsed, a misclassified page must not hide the pages it links to.
+                self.add_error_to_report(link, LinkStatus.SOFT_404)
+
             return response
 
         except requests.exceptions.RetryError as e:
             self.add_error_to_report(link, LinkStatus.OTHER_ERROR, str(e))
         except requests.exceptions.HTTPError as e:
             if hasattr(e, "response"):
+                self._record_redirects(link, e.response)
                 if e.response.status_code == 404:
                     self.add_error_to_report(link, LinkStatus.NO_SUCH_PAGE)
                 else:
@@ -143,19 +171,140 @@ class Crawler(Processor):
 
         return None
 
+    def _request(self, session, method: str, url: str) -> requests.Response:
+        return timed_request(session, method, url, self.latency_tracker, self.resources.hedge_executor,
+                             verify=False, allow_redirects=True)
+
+    def _record_redirects(self, link: Link, response: requests.Response) -> None:
+        if not response.history:
+            if not link.redirect_chain:
+                # Checks the redirect rules that would have rewritten the URL.
+                self.redirect_cache.record([link.url])
+            return
+        chain = [hop.url for hop in response.history[1:]] + [response.url]
+        # A link rewritten from the cache may still redirect further.
+        link.redirect_chain = (link.redirect_chain if link.redirect_chain else [link.url]) + chain
+        self.redirect_cache.record(link.redirect_chain)
+
+    def _claim_page(self, url: str) -> bool:
+        """Return True if the page was not parsed yet, it will be parsed by the caller."""
+        with self.redirect_lock:
+            if url in self.parsed_urls:
+                return False
+            self.parsed_urls.add(url)
+            return True
+
+    def _should_report_http(self, url: str) -> bool:
+        with self.redirect_lock:
+            if url in self.http_reported_urls:
+                return False
+            self.http_reported_urls.add(url)
+            return True
+
+    def _resolve_redirects(self, url: str, depth: int, first_found_on: str) -> List[str]:
+        """Return the redirect chain a URL is known to lead to, so the redirect is not followed again."""
+        chain = self.redirect_cache.resolve(url)
+        if chain is None:
+            return []
+        logger.debug(f'{url} is known to redirect to {chain[-1]}')
+        with self.redirect_lock:
+            self.redirect_rewrites += 1
+        if url.startswith("http://") and chain[-1].startswith("https://") and self._should_report_http(url):
+            self.add_error_to_report(Link(url, depth, first_found_on, redirect_chain=chain),
+                                     LinkStatus.HTTP_INSTEAD_OF_HTTPS)
+        return chain
+
     def process(self, task: Link) -> List[Link]:
         logger.debug(f'Handling {str(task)}')
-        session = self.sessions[threading.current_thread().name]
-        response = self.fetch_url(task, session)
-        return self.parse_and_get_links(response, task) if response else []
+        if not task.redirect_chain:
+            # A redirect rule may have been learned since the link was found.
+            task.redirect_chain = self._resolve_redirects(task.url, task.depth, task.first_found_on)
+        external = not task.url.startswith(self.target_urls)
+        if external and self._replay_external_outcome(task):
+            return []
+        response = self.fetch_url(task, self.transport.session)
+        if external:
+            self.external_link_cache.put(task.url, task.status, task.error, task.redirect_chain)
+        if not response:
+            return []
+        # Several URLs may redirect to the same page, it is parsed only once.
+        if not self._claim_page(response.url):
+            logger.debug(f'{response.url} was already parsed, skipping.')
+            return []
+        found_links = self.parse_and_get_links(response, task)
+        # Edges are recorded with the URLs as they were linked, findings such as http links are about them.
+        self.referrer_index.add_edges(task.url, [link.get_linked_urls()[0] for link in found_links])
+        return found_links
+
+    def _replay_external_outcome(self, link: Link) -> bool:
+        """Report an external link as it was found by a previous crawl, return False if it must be checked."""
+        outcome = self.external_link_cache.get(link.url)
+        if outcome is None:
+            return False
+        status, error, redirect_chain = outcome
+        logger.debug(f'{link.url} was checked recently, reusing its outcome.')
+        link.redirect_chain = redirect_chain
+        if status is not None:
+            self.add_error_to_report(link, status, error)
+        elif (link.url.startswith("http://") and redirect_chain and redirect_chain[-1].startswith("https://")
+              and self._should_report_http(link.url)):
+            self.add_error_to_report(link, LinkStatus.HTTP_INSTEAD_OF_HTTPS)
+        return True
+
+    def priority(self, link: Link, inbound: int) -> tuple:
+        """
+        Return the crawl priority of a link, lower values are crawled first.
+
+        Links reported in the previous crawl come first, then shallow links, then links found on many pages.
+        External links are only checked, not parsed, so they are ranked as shallow as possible.
+        """
+        depth = link.depth if link.url.startswith(self.target_urls) else 1
+        return link.url not in self.previously_broken_urls, depth, -inbound
+
+    def limit_traps(self, link: Link) -> None:
+        """
+        Called once for every newly found link, before it is queued.
+
+        Internal links of URL templates generating too many URLs are sampled, see TrapDetector. The links that
+        are not sampled are moved to the depth limit, so they are still checked, like external links, but not
+        parsed, and cannot generate more URLs.
+        """
+        if self.trap_detector is None or not link.url.startswith(self.target_urls):
+            return
+        if not self.trap_detector.admit(link.url):
+            logger.debug(f'{link.url} matches a URL pattern over budget, it will be checked but not parsed.')
+            link.depth = self.max_depth
+
+    def parse_page(self, body: bytes) -> ParsedPage:
+        cache_key = self.parse_cache.key(body)
+        page = self.parse_cache.get(cache_key)
+        if page is not None:
+            logger.debug('Identical page body was already parsed, using cached links.')
+            return page
+
+        soup = BeautifulSoup(body, "html.parser", from_encoding="iso-8859-1")
+        hrefs = tuple(link_element["href"] for link_element in soup.find_all("a", href=True))
+        anchors = {element["id"] for element in soup.find_all(id=True)}
+        anchors.update(element["name"] for element in soup.find_all("a", attrs={"name": True}))
+        page = (hrefs, frozenset(anchors))
+        self.parse_cache.put(cache_key, page)
+        return page
 
     def parse_and_get_links(self, response: requests.Response, current_link: Link) -> List[Link]:
         logger.debug(f'Parsing {current_link.url}')
-        soup = BeautifulSoup(response.content, "html.parser", from_encoding="iso-8859-1")
+        hrefs, anchors = self.parse_page(response.content)
         found_links: List[Link] = []
+        # After a redirect, e.g. /docs to /docs/, relative links are relative to the page that was served.
+        page_url = response.url or current_link.url
+        page_urls = {current_link.url, page_url}
 
-        for link_element in soup.find_all("a", href=True):
-            url = requests.compat.urljoin(self.target_url, link_element["href"])
+        # Fragment links may point to the page by the URL it was linked with or by the one it was served from.
+        for url in page_urls:
+            for fragment_link, fragment in self.anchor_index.add_page(url, anchors):
+                self._report_missing_fragment(fragment_link, fragment)
+
+        for href in hrefs:
+            url = requests.compat.urljoin(page_url, href)
 
             if not url.startswith('http'):
                 logger.debug(f'Ignoring {url}')
@@ -169,50 +318,78 @@ class Crawler(Processor):
                 logger.debug(f'{url} is known as non-crawler friendly, skipping.')
                 continue
 
-            if url.startswith(f'{current_link.url}#'):
-                logger.debug(f'Section on the same page found: {url}')
-                parsed = urlparse(url)
-                fragment_id = parsed.fragment
-                if soup.find(id=fragment_id):
-                    logger.debug(f'Fragment {fragment_id} exists on the page.')
-                else:
-                    logger.debug(f'Fragment {fragment_id} does not exist the page.')
-                    self.add_error_to_report(Link(url, current_link.depth + 1, current_link.url),
-                                             LinkStatus.OTHER_ERROR, "Fragment {fragment_id} does not exist the page.")
-            elif url.startswith(self.target_url):
+            url, fragment = urldefrag(url)
+            redirect_chain = self._resolve_redirects(url, current_link.depth + 1, current_link.url)
+            if redirect_chain:
+                url = redirect_chain[-1]
+            if fragment and url.startswith(self.target_urls):
+                self._check_fragment(url, unquote(fragment), current_link)
+
+            if url in page_urls:
+                logger.debug(f'Section on the same page found: {url}#{fragment}')
+            elif url.startswith(self.target_urls):
                 logger.debug(f'Internal link found: {url}')
-                found_links.append(Link(url, current_link.depth + 1, current_link.url))
+                found_links.append(Link(url, current_link.depth + 1, current_link.url, redirect_chain=redirect_chain))
             else:
                 logger.debug(f'External link found: {url}')
-                found_links.append(Link(url, self.max_depth, current_link.url))
+                found_links.append(Link(url, self.max_depth, current_link.url, redirect_chain=redirect_chain))
 
         logger.debug(f'Finished parsing. {len(found_links)} links were found.')
         return found_links
 
+    def _check_fragment(self, page_url: str, fragment: str, current_link: Link) -> None:
+        fragment_link = Link(f'{page_url}#{fragment}', current_link.depth + 1, current_link.url)
+        exists = self.anchor_index.check(page_url, fragment, fragment_link)
+        if exists is None:
+            logger.debug(f'Fragment {fragment} check deferred until {page_url} is parsed.')
+        elif exists:
+            logger.debug(f'Fragment {fragment} exists on {page_url}.')
+        else:
+            self._report_missing_fragment(fragment_link, fragment)
+
+    def _report_missing_fragment(self, fragment_link: Link, fragment: str) -> None:
+        logger.debug(f'Fragment {fragment} does not exist on the page.')
+        self.add_error_to_report(fragment_link, LinkStatus.OTHER_ERROR,
+                                 f"Fragment {fragment} does not exist the page.")
+
     def finalize(self) -> None:
         logger.debug('Finalizing')
+        unresolved = self.anchor_index.get_unresolved_num()
+        if unresolved:
+            logger.debug(f'{unresolved} fragment links point to pages that were not parsed.')
 
     def initiate(self) -> None:
-        system = platform.system()
-        if system == "Windows":
-            os_info = "Windows NT 10.0; Win64; x64"
-        elif system == "Darwin":  # macOS
-            os_info = "Macintosh; Intel Mac OS X 10_15_7"
-        elif system == "Linux":
-            os_info = "X11; Linux x86_64"
-        else:
-            os_info = "X11; Unknown OS"
-
-        user_agent = (
-            f"Mozilla/5.0 ({os_info}) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/122.0.0.0 Safari/537.36"
-        )
-
-        session = requests.Session()
-        session.headers.update({"User-Agent": user_agent})
-        self.sessions[threading.current_thread().name] = session
-        logger.debug(f'Created session with User-Agent for {system}: {user_agent}')
+        logger.debug('Initiating')
+
+    def get_connection_stats(self) -> dict:
+        return self.transport.get_stats()
+
+    def get_latency_stats(self) -> dict:
+        return self.latency_tracker.get_stats()
+
+    def get_parse_cache_stats(self) -> dict:
+        return self.parse_cache.get_stats()
+
+    def get_external_link_cache_stats(self) -> dict:
+        return self.external_link_cache.get_stats()
+
+    def get_redirect_stats(self) -> dict:
+        return dict(self.redirect_cache.get_stats(), rewrites=self.redirect_rewrites)
+
+    def get_trap_stats(self) -> dict:
+        if self.trap_detector is None:
+            return {"patterns": 0, "suppressed_patterns": 0, "suppressed_urls": 0}
+        return self.trap_detector.get_stats()
+
+    def get_suppressed_patterns(self) -> dict:
+        return self.trap_detector.get_suppressed() if self.trap_detector else dict()
+
+    def attach_referrers(self, links: List[Link]) -> None:
+        """Set the referrers of links to all the pages linking to them."""
+        referrers = self.referrer_index.get_referrers(url for link in links for url in link.get_linked_urls())
+        for link in links:
+            link.referrers = list(dict.fromkeys(referrer for url in link.get_linked_urls()
+                                                for referrer in referrers.get(url, []))) or [link.first_found_on]
 
     def get_broken_links(self):
         return self.broken_links
@@ -0,0 +1,81 @@
+import platform
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from loguru import logger
+
+from connection_pool import SharedTransport
+from external_link_cache import ExternalLinkCache
+from host_latency import LatencyTracker
+from parse_cache import ParseCache
+from redirect_cache import RedirectCache
+from soft404 import Soft404Detector
+from url_filter import UrlFilter
+
+
+def build_user_agent() -> str:
+    system = platform.system()
+    if system == "Windows":
+        os_info = "Windows NT 10.0; Win64; x64"
+    elif system == "Darwin":  # macOS
+        os_info = "Macintosh; Intel Mac OS X 10_15_7"
+    elif system == "Linux":
+        os_info = "X11; Linux x86_64"
+    else:
+        os_info = "X11; Unknown OS"
+
+    user_agent = (
+        f"Mozilla/5.0 ({os_info}) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    )
+    logger.debug(f'Using User-Agent for {system}: {user_agent}')
+    return user_agent
+
+
+class CrawlerResources:
+    """
+    Long-lived objects used by a crawl that can be shared by several crawls.
+
+    Sharing them keeps connections, parsed pages, external link outcomes and per-host knowledge warm between
+    crawls.
+    """
+
+    NON_CRAWLING_FILE = 'non_crawling_urls.json'
+    # Each request waiting on a hedge occupies two threads.
+    HEDGE_THREADS = 100
+
+    def __init__(
+        self,
+        non_crawling_files: List[str] = (),
+        max_host_connections: int = SharedTransport.DEFAULT_MAX_HOST_CONNECTIONS,
+        parse_cache: Optional[ParseCache] = None,
+        detect_soft_404: bool = True,
+        max_timeout: float = LatencyTracker.DEFAULT_MAX_TIMEOUT,
+        hedge_requests: bool = False
+    ):
+        """
+        Initialize the resources.
+
+        Args:
+            non_crawling_files: Additional lists of URLs not to crawl, see UrlFilter.from_files.
+            max_host_connections: Maximum number of concurrent connections to a single host.
+            parse_cache: Cache of parsed pages, a default one is created if not given.
+            detect_soft_404: Whether to detect error pages served with status 200.
+            max_timeout: Upper bound in seconds of the duration of any request.
+            hedge_requests: Whether to send a second request when a host is slower than usual and use the first answer.
+        """
+        self.transport = SharedTransport(build_user_agent(), max_host_connections)
+        self.url_filter = UrlFilter.from_files([self.NON_CRAWLING_FILE, *non_crawling_files])
+        self.parse_cache = parse_cache if parse_cache else ParseCache()
+        self.redirect_cache = RedirectCache()
+        self.external_link_cache = ExternalLinkCache()
+        self.latency_tracker = LatencyTracker(max_timeout)
+        self.soft_404_detector = Soft404Detector(self.latency_tracker) if detect_soft_404 else None
+        self.hedge_executor = ThreadPoolExecutor(self.HEDGE_THREADS, "Hedge") if hedge_requests else None
+
+    def close(self) -> None:
+        if self.hedge_executor:
+            self.hedge_executor.shutdown(wait=False)
+        self.transport.close()
+        self.parse_cache.close()
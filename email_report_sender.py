@@ -58,7 +58,7 @@ class EmailReportSender:
                     report_text = f.read()
                 msg.attach(MIMEText(report_text, "plain"))
 
-            case "html":
+            case "html" | "html_summary":
                 with open(report_path, "r", encoding="utf-8") as f:
                     report_html = f.read()
                 msg.attach(MIMEText(report_html, "html"))
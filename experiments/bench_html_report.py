@@ -0,0 +1,117 @@
+"""
+Size and generation time of the HTML reports with very many findings, compared with the former report that
+inlined every finding as a table row. When node is installed, the time the browser script needs to decode the
+embedded findings and group them by host is measured too. Painting is not measured: only the rows visible on
+screen are put in the page, so it does not depend on the number of findings.
+
+Run from the repository root:
+    python experiments/bench_html_report.py [rows_num ...]
+"""
+import html
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_report import HtmlReport  # noqa: E402
+from html_summary_report import HtmlSummaryReport  # noqa: E402
+from link import Link, LinkStatus  # noqa: E402
+
+NODE_SCRIPT = """
+const fs = require('fs');
+const encoded = fs.readFileSync(process.argv[2], 'utf8');
+(async () => {
+    const start = performance.now();
+    const response = await fetch('data:application/gzip;base64,' + encoded);
+    const text = await new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).text();
+    const data = JSON.parse(text);
+    const decoded = performance.now();
+    const HOST = /^[a-z][a-z0-9+.-]*:\\/\\/([^\\/?#]+)/i;
+    const counts = new Map();
+    for (const row of data.sections[0]) {
+        const host = HOST.exec(data.urls[row[0]])[1];
+        counts.set(host, (counts.get(host) || 0) + 1);
+    }
+    console.log(`${(decoded - start).toFixed(0)} ${(performance.now() - decoded).toFixed(0)}`);
+})();
+"""
+
+
+def make_links(rows_num: int) -> tuple[list[Link], list[Link]]:
+    rng = random.Random(0)
+    pages = [f"https://www.example.com/section{i % 40}/article-{i}.html" for i in range(max(rows_num // 10, 1))]
+    statuses = [LinkStatus.NO_SUCH_PAGE] * 8 + [LinkStatus.NO_SUCH_DOMAIN, LinkStatus.SOFT_404]
+    broken, errors = [], []
+    for i in range(rows_num):
+        referrers = rng.sample(pages, rng.choice((1, 1, 1, 2, 5)))
+        url = f"https://host{rng.randrange(200)}.example.org/path/{i}/resource-{rng.randrange(10 ** 6)}"
+        if i % 10:
+            broken.append(Link(url, rng.randrange(1, 6), referrers[0], rng.choice(statuses), referrers=referrers))
+        else:
+            errors.append(Link(url, rng.randrange(1, 6), referrers[0], LinkStatus.OTHER_ERROR,
+                               f"HTTPError: {rng.choice((500, 502, 503))} - Server Error", referrers=referrers))
+    return broken, errors
+
+
+def legacy_report_size(broken: list[Link], errors: list[Link]) -> int:
+    """Size of the former report rows, one <tr> per finding with its referrers inlined, without the page around."""
+    size = 0
+    for links, show_status in ((broken, True), (errors, False)):
+        for idx, link in enumerate(links, 1):
+            row = "<tr><td>{}</td>".format(idx)
+            row += "<td><a href='{0}' target='_blank'>{0}</a></td>".format(html.escape(link.url))
+            row += "<td>{}</td>".format(link.depth)
+            row += "<td><a href='{0}' target='_blank'>{0}</a></td>".format(html.escape(link.first_found_on))
+            row += "<td><details><summary>{}</summary>{}</details></td>".format(
+                len(link.referrers), "<br>".join("<a href='{0}' target='_blank'>{0}</a>".format(html.escape(url))
+                                                 for url in link.referrers))
+            row += "<td>{}</td></tr>".format(html.escape(link.status.name.lower() if show_status else link.error))
+            size += len(row)
+    return size
+
+
+def measure_client(encoded: str) -> str:
+    if not shutil.which("node"):
+        return "node not installed"
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = os.path.join(directory, "data.txt")
+        script_path = os.path.join(directory, "decode.js")
+        with open(data_path, "w") as f:
+            f.write(encoded)
+        with open(script_path, "w") as f:
+            f.write(NODE_SCRIPT)
+        output = subprocess.run(["node", script_path, data_path], capture_output=True, text=True, check=True)
+    decode_ms, group_ms = output.stdout.split()
+    return f"decode+parse {decode_ms} ms, group by host {group_ms} ms"
+
+
+def main() -> None:
+    rows_nums = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for rows_num in rows_nums:
+        broken, errors = make_links(rows_num)
+        print(f"{rows_num} findings:")
+
+        start = time.perf_counter()
+        legacy_size = legacy_report_size(broken, errors)
+        print(f"  former inline table : {legacy_size / 2 ** 20:8.1f} MB  {time.perf_counter() - start:6.2f}s")
+
+        start = time.perf_counter()
+        report = HtmlReport().generate("https://www.example.com/", broken, errors, "01:00:00", rows_num, 20)
+        print(f"  html                : {len(report) / 2 ** 20:8.1f} MB  {time.perf_counter() - start:6.2f}s")
+
+        start = time.perf_counter()
+        summary = HtmlSummaryReport().generate("https://www.example.com/", broken, errors, "01:00:00", rows_num, 20)
+        print(f"  html_summary        : {len(summary) / 2 ** 10:8.1f} KB  {time.perf_counter() - start:6.2f}s")
+
+        encoded = report.split("<script id='report-data' type='application/octet-stream'>")[1].split("</script>")[0]
+        del report
+        print(f"  browser script      : {measure_client(encoded)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark of per-request duration against a local server with a heavy tail of slow and stalled responses,
+with a fixed timeout, with latency-adaptive timeouts and with adaptive timeouts plus hedging.
+
+Run from the repository root:
+    python experiments/bench_latency.py [requests_num] [stall_seconds]
+"""
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from host_latency import LatencyTracker, percentile, timed_request  # noqa: E402
+
+CLIENT_THREADS = 4
+FIXED_TIMEOUT = 10.0
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answers most requests in ~10 ms, 5% in 50-100 ms and stalls 1% of them."""
+
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+    stall_seconds = 8.0
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        with self.rng_lock:
+            draw = self.rng.random()
+            slow_delay = self.rng.uniform(0.05, 0.1)
+        time.sleep(self.stall_seconds if draw < 0.01 else slow_delay if draw < 0.06 else 0.01)
+        body = b"<html><body>page</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run(url: str, requests_num: int, tracker: LatencyTracker, hedge_executor=None) -> tuple[list[float], int]:
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=32))
+    durations = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        start = time.monotonic()
+        try:
+            timed_request(session, "GET", url, tracker, hedge_executor)
+        except requests.exceptions.RequestException:
+            with lock:
+                errors += 1
+        with lock:
+            durations.append(time.monotonic() - start)
+
+    # Warm up the latency window of the host.
+    for _ in range(LatencyTracker.MIN_SAMPLES):
+        one(None)
+    durations.clear()
+    errors = 0
+    with ThreadPoolExecutor(CLIENT_THREADS) as executor:
+        list(executor.map(one, range(requests_num)))
+    session.close()
+    return durations, errors
+
+
+def main() -> None:
+    requests_num = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    SlowHandler.stall_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 8.0
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    server.daemon_threads = True
+    server.handle_error = lambda request, client_address: None  # Abandoned requests break their pipe.
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    fixed = LatencyTracker(FIXED_TIMEOUT)
+    fixed.MIN_SAMPLES = float("inf")  # Never adapts: every request gets the fixed timeout.
+    adaptive = LatencyTracker(FIXED_TIMEOUT)
+    hedged = LatencyTracker(FIXED_TIMEOUT)
+    hedge_executor = ThreadPoolExecutor(2 * CLIENT_THREADS)
+
+    print(f"requests: {requests_num}, {CLIENT_THREADS} client threads, 1% stalls of {SlowHandler.stall_seconds}s")
+    print(f"{'mode':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'errors':>8}{'hedged':>8}{'wall':>8}")
+    for name, tracker, executor in (("fixed 10s timeout", fixed, None), ("adaptive timeout", adaptive, None),
+                                    ("adaptive + hedging", hedged, hedge_executor)):
+        start = time.monotonic()
+        durations, errors = run(url, requests_num, tracker, executor)
+        wall = time.monotonic() - start
+        print(f"{name:<22}" + "".join(f"{percentile(durations, q) * 1000:>7.0f}ms" for q in (0.5, 0.95, 0.99))
+              + f"{max(durations) * 1000:>7.0f}ms{errors:>8}{tracker.hedged:>8}{wall:>7.1f}s")
+
+    hedge_executor.shutdown()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Memory of the referrer index on a synthetic link graph, compared with keeping the referrer URLs of each URL.
+
+As in a crawl, every parsed page produces new URL strings, so what a structure retains includes the strings
+it keeps alive. Link popularity follows a power law: navigation links appear on every page while most links
+appear on a few pages only.
+
+Run from the repository root:
+    python experiments/bench_referrer_index.py [edges_num] [links_per_page]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from referrer_index import ReferrerIndex  # noqa: E402
+
+
+def build_graph(edges_num: int, links_per_page: int) -> list[tuple[int, list[int]]]:
+    rng = random.Random(0)
+    pages_num = edges_num // links_per_page
+    graph = []
+    for page in range(pages_num):
+        # paretovariate gives a few very popular targets and a long tail of rarely linked ones.
+        targets = dict.fromkeys(min(int(rng.paretovariate(0.6)) - 1, 2 * pages_num - 1)
+                                for _ in range(links_per_page // 2))
+        while len(targets) < links_per_page:
+            targets[rng.randrange(2 * pages_num)] = None
+        graph.append((page, list(targets)))
+    return graph
+
+
+def url(page: int) -> str:
+    return f"https://www.example.com/section{page % 50}/page-{page}.html"
+
+
+def parsed_pages(graph: list[tuple[int, list[int]]]):
+    for source, targets in graph:
+        yield url(source), [url(target) for target in targets]
+
+
+def measure(name: str, graph: list[tuple[int, list[int]]], build) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    structure = build(parsed_pages(graph))
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    edges_num = sum(len(targets) for _, targets in graph)
+    print(f"{name:<28}{size / 2 ** 20:>9.1f} MB{size / edges_num:>9.1f} B/edge{elapsed:>8.2f}s")
+    del structure
+
+
+def build_index(graph):
+    index = ReferrerIndex()
+    for source, targets in graph:
+        index.add_edges(source, targets)
+    return index
+
+
+def build_url_lists(graph):
+    referrers = defaultdict(list)
+    for source, targets in graph:
+        for target in dict.fromkeys(targets):
+            referrers[target].append(source)
+    return referrers
+
+
+def build_url_sets(graph):
+    referrers = defaultdict(set)
+    for source, targets in graph:
+        for target in targets:
+            referrers[target].add(source)
+    return referrers
+
+
+def main() -> None:
+    edges_num = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    links_per_page = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    graph = build_graph(edges_num, links_per_page)
+    targets_num = len({target for _, targets in graph for target in targets})
+    print(f"pages: {len(graph)}, linked URLs: {targets_num}, edges: {sum(len(targets) for _, targets in graph)}")
+
+    measure("ReferrerIndex", graph, build_index)
+    measure("dict of referrer URL lists", graph, build_url_lists)
+    measure("dict of referrer URL sets", graph, build_url_sets)
+
+    index = build_index(parsed_pages(graph))
+    broken_urls = [url(targets[0]) for _, targets in graph[:1000]]
+    start = time.perf_counter()
+    referrers = index.get_referrers(broken_urls)
+    print(f"referrers of {len(broken_urls)} URLs looked up in {time.perf_counter() - start:.2f}s, "
+          f"{sum(map(len, referrers.values()))} found")
+
+
+if __name__ == "__main__":
+    main()
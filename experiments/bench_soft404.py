@@ -0,0 +1,59 @@
+"""
+Benchmark of the soft 404 detection cost per fetched page, compared with the cost of parsing the page.
+
+Run from the repository root:
+    python experiments/bench_soft404.py [pages_num] [words_per_page]
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from soft404 import minhash, page_text, similarity  # noqa: E402
+
+
+def random_page(rng: random.Random, vocabulary: list[str], navigation: str, words_num: int) -> str:
+    paragraphs = []
+    for _ in range(words_num // 50):
+        words = " ".join(rng.choices(vocabulary, k=50))
+        paragraphs.append(f"<p>{words} <a href='/{rng.choice(vocabulary)}'>{rng.choice(vocabulary)}</a></p>")
+    return f"<html><head><title>page</title></head><body><nav>{navigation}</nav>{''.join(paragraphs)}</body></html>"
+
+
+def main() -> None:
+    pages_num = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    words_num = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(0)
+
+    vocabulary = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(5000)]
+    navigation = " ".join(f"<a href='/{word}'>{word}</a>" for word in rng.sample(vocabulary, 40))
+    error_page = (f"<html><body><nav>{navigation}</nav><h1>Page not found</h1>"
+                  f"<p>Sorry, the page you requested does not exist.</p></body></html>")
+    pages = [random_page(rng, vocabulary, navigation, words_num) for _ in range(pages_num)]
+
+    baseline = minhash(page_text(error_page))
+
+    start = time.perf_counter()
+    matches = sum(1 for page in pages if similarity(minhash(page_text(page)), baseline) >= 0.85)
+    detection_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for page in pages:
+        BeautifulSoup(page, "html.parser").find_all("a", href=True)
+    parse_time = time.perf_counter() - start
+
+    other_error_page = error_page.replace("you requested", "at /missing/path you requested")
+    print(f"pages: {pages_num}, ~{len(pages[0]) // 1024} KB each")
+    print(f"soft 404 detection : {detection_time / pages_num * 1000:.2f} ms/page, {matches} false positives")
+    print(f"html.parser parse  : {parse_time / pages_num * 1000:.2f} ms/page")
+    print(f"detection overhead : {detection_time / parse_time:.1%} of parsing")
+    print(f"error page variant similarity: {similarity(minhash(page_text(other_error_page)), baseline):.2f}")
+
+
+if __name__ == "__main__":
+    main()
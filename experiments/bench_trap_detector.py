@@ -0,0 +1,76 @@
+"""
+Growth of the crawl on a simulated site with crawler traps, with and without the trap detector.
+
+The site has regular articles, a calendar linking to the next month forever and a faceted search where every
+page links to all its refinements. The crawl is simulated breadth first without network, up to a number of
+requests, to show whether it ends and whether the regular content is still checked. There are more articles
+than the default budget of a pattern, so the pages of some are not parsed, but like every suppressed URL they
+are still checked.
+
+Run from the repository root:
+    python experiments/bench_trap_detector.py [max_requests] [max_urls_per_pattern]
+"""
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trap_detector import TrapDetector  # noqa: E402
+
+SITE = "https://www.example.com"
+ARTICLES_NUM = 3000
+FACETS = {"color": 8, "size": 6, "brand": 20, "sort": 4}
+
+
+def links_of(url: str) -> list[str]:
+    path = url[len(SITE):]
+    if path == "/":
+        return [f"{SITE}/articles/{i}" for i in range(ARTICLES_NUM)] + [f"{SITE}/calendar/2024/1", f"{SITE}/search"]
+    if path.startswith("/calendar/"):
+        year, month = map(int, path.split("/")[2:4])
+        return [f"{SITE}/calendar/{year + month // 12}/{month % 12 + 1}", f"{SITE}/articles/{month}"]
+    if path.startswith("/search"):
+        query = path.partition("?")[2]
+        used = {part.partition("=")[0] for part in query.split("&") if part}
+        return [f"{SITE}/search?{query}{'&' if query else ''}{name}={value}"
+                for name, values_num in FACETS.items() if name not in used for value in range(values_num)]
+    return [f"{SITE}/"]
+
+
+def crawl(max_requests: int, detector: TrapDetector = None) -> tuple[int, int, int, int, bool]:
+    """Return the numbers of parsed pages, of URLs only checked, of articles checked and of pending URLs."""
+    seen = {f"{SITE}/"}
+    # (URL, whether to parse it), suppressed URLs are only checked.
+    queue = deque((url, True) for url in seen)
+    parsed = checked = articles = 0
+    while queue and parsed + checked < max_requests:
+        url, parse = queue.popleft()
+        articles += "/articles/" in url
+        if not parse:
+            checked += 1
+            continue
+        parsed += 1
+        for link in links_of(url):
+            if link not in seen:
+                seen.add(link)
+                queue.append((link, detector is None or detector.admit(link)))
+    return parsed, checked, articles, len(queue), not queue
+
+
+def main() -> None:
+    max_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    max_urls_per_pattern = int(sys.argv[2]) if len(sys.argv) > 2 else TrapDetector.DEFAULT_MAX_URLS_PER_PATTERN
+    print(f"{'':<22}{'parsed':>10}{'checked':>10}{'articles':>10}{'frontier':>10}{'ended':>7}{'time':>8}")
+    for name, detector in (("without detection", None), ("with TrapDetector", TrapDetector(max_urls_per_pattern))):
+        start = time.perf_counter()
+        parsed, checked, articles, frontier, ended = crawl(max_requests, detector)
+        print(f"{name:<22}{parsed:>10}{checked:>10}{articles:>10}{frontier:>10}{str(ended):>7}"
+              f"{time.perf_counter() - start:>7.2f}s")
+        if detector:
+            print(f"{'':<22}{detector.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark of the non-crawling URL filter: the compiled UrlFilter against the original linear substring scan.
+
+Run from the repository root:
+    python experiments/bench_url_filter.py [domains_num] [lookups_num]
+"""
+import os
+import random
+import string
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_filter import UrlFilter  # noqa: E402
+
+
+def random_domain(rng: random.Random) -> str:
+    name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+    return f"{name}.{rng.choice(['com', 'net', 'org', 'io', 'co.uk'])}"
+
+
+def linear_is_known_non_crawling(domains: set, url: str) -> bool:
+    hostname = urlparse(url).hostname or ""
+    return any(domain in hostname for domain in domains)
+
+
+def measure(fn, urls) -> tuple[float, int]:
+    start = time.perf_counter()
+    hits = sum(1 for url in urls if fn(url))
+    return time.perf_counter() - start, hits
+
+
+def main() -> None:
+    domains_num = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lookups_num = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rng = random.Random(0)
+
+    domains = {random_domain(rng) for _ in range(domains_num)}
+    blocked = rng.sample(sorted(domains), min(100, len(domains)))
+    urls = [f"https://www.{rng.choice(blocked)}/page" if i % 10 == 0 else f"https://{random_domain(rng)}/page"
+            for i in range(lookups_num)]
+
+    start = time.perf_counter()
+    url_filter = UrlFilter(domains)
+    build_time = time.perf_counter() - start
+
+    linear_time, linear_hits = measure(lambda url: linear_is_known_non_crawling(domains, url), urls)
+    trie_time, trie_hits = measure(url_filter.is_excluded, urls)
+
+    print(f"domains: {len(domains)}, lookups: {lookups_num}")
+    print(f"UrlFilter build time      : {build_time:.3f}s")
+    print(f"linear substring scan     : {linear_time:.3f}s ({linear_time / lookups_num * 1e6:.1f} us/lookup), "
+          f"{linear_hits} hits")
+    print(f"UrlFilter (suffix trie)   : {trie_time:.3f}s ({trie_time / lookups_num * 1e6:.1f} us/lookup), "
+          f"{trie_hits} hits")
+    print(f"speedup                   : {linear_time / trie_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
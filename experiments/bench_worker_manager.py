@@ -0,0 +1,64 @@
+"""
+Stress benchmark of WorkerManager with a no-op processor, showing tasks/sec for different thread counts.
+
+The processor expands a synthetic link graph: every task links to `fanout` new children and to
+`duplicates` already seen tasks, as pages do with their navigation links, so both the enqueue path
+and the dedup path are exercised.
+
+Run from the repository root:
+    python experiments/bench_worker_manager.py [tasks_num] [fanout] [duplicates]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger  # noqa: E402
+
+from processor import Processor  # noqa: E402
+from worker_manager import WorkerManager  # noqa: E402
+
+
+class NoOpProcessor(Processor):
+    def __init__(self, tasks_num: int, fanout: int, duplicates: int):
+        self.tasks_num = tasks_num
+        self.fanout = fanout
+        self.duplicates = duplicates
+
+    def process(self, task: int) -> list[int]:
+        children = [child for child in range(task * self.fanout + 1, task * self.fanout + self.fanout + 1)
+                    if child < self.tasks_num]
+        duplicates = [task // (i + 2) for i in range(self.duplicates)]
+        return children + duplicates
+
+    def finalize(self) -> None:
+        pass
+
+    def initiate(self) -> None:
+        pass
+
+
+def run(threads_num: int, tasks_num: int, fanout: int, duplicates: int) -> tuple[float, int]:
+    manager = WorkerManager(first_task=0, processor=NoOpProcessor(tasks_num, fanout, duplicates),
+                            threads_num=threads_num, repeat_task=False)
+    start = time.perf_counter()
+    manager.start()
+    manager.end()
+    return time.perf_counter() - start, manager.get_processed_num()
+
+
+def main() -> None:
+    tasks_num = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    fanout = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    duplicates = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    logger.remove()
+
+    print(f"tasks: {tasks_num}, fanout: {fanout}, duplicates: {duplicates}")
+    for threads_num in (1, 2, 4, 8, 16, 32):
+        elapsed, processed = run(threads_num, tasks_num, fanout, duplicates)
+        print(f"{threads_num:3} threads: {processed} tasks in {elapsed:.2f}s = {processed / elapsed:,.0f} tasks/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from link import LinkStatus
+
+# The status of the link, None if it was fine, its error and the redirect chain it was fetched through.
+LinkOutcome = Tuple[Optional[LinkStatus], str, List[str]]
+
+
+class ExternalLinkCache:
+    """
+    A bounded LRU cache of the outcomes of the external links checked by previous crawls.
+
+    Sites often link to the same external pages, so a crawl sharing the cache with earlier ones does not
+    request them again while their outcome is fresh. Only lasting outcomes are cached, a link that failed
+    with a timeout, a connection error or a server error is checked again by the next crawl.
+    """
+
+    DEFAULT_SIZE = 100000
+    DEFAULT_TTL = 3600
+    BROKEN_STATUSES = (LinkStatus.NO_SUCH_PAGE, LinkStatus.NO_SUCH_DOMAIN)
+    # An http link to an https page is found again from its redirect chain.
+    FINE_STATUSES = (LinkStatus.NOT_VISITED, LinkStatus.HTTP_INSTEAD_OF_HTTPS)
+
+    def __init__(self, max_entries: int = DEFAULT_SIZE, ttl: float = DEFAULT_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of links kept in memory.
+            ttl: Number of seconds an outcome is reused for.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, Tuple[float, LinkOutcome]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[LinkOutcome]:
+        """
+        Look up the outcome of a link.
+
+        Args:
+            url: The URL of the link, as it was linked.
+
+        Returns:
+            The outcome of the link, or None if it was not checked recently.
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.entries.move_to_end(url)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, url: str, status: LinkStatus, error: str, redirect_chain: List[str]) -> None:
+        """
+        Store the outcome of a link that was just checked, outcomes that may be transient are ignored.
+
+        Args:
+            url: The URL of the link, as it was linked.
+            status: The status the link was reported with, NOT_VISITED if it was fine.
+            error: The error of the link.
+            redirect_chain: The redirect chain the link was fetched through.
+        """
+        if status not in self.BROKEN_STATUSES + self.FINE_STATUSES:
+            return
+        outcome = (status if status in self.BROKEN_STATUSES else None, error, list(redirect_chain))
+        with self.lock:
+            self.entries[url] = (time.monotonic(), outcome)
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+import requests
+
+from connection_pool import get_pool_wait
+
+T = TypeVar("T")
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LatencyTracker:
+    """
+    Recent request durations of each host, used to derive the timeout and the hedging delay of its next requests.
+
+    Until a host has enough samples its requests get the maximum timeout. A timed out request is recorded
+    with the timeout it had, so a host that becomes slower gets longer timeouts again.
+    """
+
+    WINDOW = 100
+    MIN_SAMPLES = 10
+    TIMEOUT_FACTOR = 4
+    MIN_TIMEOUT = 2.0
+    DEFAULT_MAX_TIMEOUT = 30.0
+
+    def __init__(self, max_timeout: float = DEFAULT_MAX_TIMEOUT):
+        """
+        Initialize the tracker.
+
+        Args:
+            max_timeout: Upper bound in seconds of the duration of any request.
+        """
+        self.max_timeout = max_timeout
+        self.samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.WINDOW))
+        self.timeouts = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.lock = threading.Lock()
+
+    def record(self, host: str, seconds: float, timed_out: bool = False) -> None:
+        with self.lock:
+            self.samples[host].append(seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def record_hedge(self, hedge_won: bool) -> None:
+        with self.lock:
+            self.hedged += 1
+            if hedge_won:
+                self.hedge_wins += 1
+
+    def _get_percentile(self, host: str, fraction: float) -> Optional[float]:
+        with self.lock:
+            samples = list(self.samples.get(host, ()))
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+        return percentile(samples, fraction)
+
+    def get_timeout(self, host: str) -> float:
+        """
+        Return the timeout of the next request to a host: a multiple of its p95 latency, capped by max_timeout.
+
+        The p95 is used rather than the p99 so that a few timed out requests do not raise the timeout of the
+        next ones, unless they become frequent.
+        """
+        p95 = self._get_percentile(host, 0.95)
+        if p95 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.MIN_TIMEOUT, p95 * self.TIMEOUT_FACTOR))
+
+    def get_hedge_delay(self, host: str) -> Optional[float]:
+        """Return the p95 latency of a host, after which a request to it is hedged, or None if it is not known yet."""
+        return self._get_percentile(host, 0.95)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            samples = [seconds for host_samples in self.samples.values() for seconds in host_samples]
+            stats = {"hosts": len(self.samples), "timeouts": self.timeouts, "hedged": self.hedged,
+                     "hedge_wins": self.hedge_wins}
+        stats["p50"] = percentile(samples, 0.5) if samples else 0.0
+        stats["p99"] = percentile(samples, 0.99) if samples else 0.0
+        return stats
+
+
+def hedged_call(fn: Callable[[], T], delay: float, executor: Executor) -> Tuple[T, bool, bool]:
+    """
+    Call a function, and call it a second time if the first call did not return after a delay.
+
+    Args:
+        fn: The function to call, it must be safe to call twice.
+        delay: Seconds to wait for the first call before starting the second one.
+        executor: The executor running the calls.
+
+    Returns:
+        The result of the first call to succeed, whether a second call was started and whether it won.
+        If both calls fail, the exception of the first one is raised.
+    """
+    first = executor.submit(fn)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result(), False, False
+
+    second = executor.submit(fn)
+    pending = {first, second}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result(), True, future is second
+    return first.result(), True, False
+
+
+def timed_request(session: requests.Session, method: str, url: str, tracker: LatencyTracker,
+                  hedge_executor: Optional[Executor] = None, **kwargs) -> requests.Response:
+    """
+    Send a request whose whole duration, body included, is bounded by the timeout of its host.
+
+    The time spent waiting for a free connection to a host is neither recorded nor bounded, it depends on the
+    other requests to the host, each of them bounded, and not on how fast the host answers.
+
+    Args:
+        session: The session to send the request with.
+        method: The HTTP method.
+        url: The URL to request.
+        tracker: The latency tracker providing the timeout and recording the duration.
+        hedge_executor: If given, the request is hedged after the p95 latency of the host.
+        **kwargs: Passed to session.request.
+
+    Returns:
+        The response, with its body already read.
+    """
+    host = urlparse(url).netloc
+    timeout = tracker.get_timeout(host)
+
+    def attempt() -> requests.Response:
+        start = time.monotonic()
+        pool_wait = get_pool_wait()
+
+        def elapsed() -> float:
+            return time.monotonic() - start - (get_pool_wait() - pool_wait)
+
+        try:
+            response = session.request(method, url, timeout=timeout, stream=True, **kwargs)
+            # The read timeout only bounds each read, a server trickling bytes is stopped by the deadline.
+            chunks = []
+            for chunk in response.iter_content(64 * 1024):
+                chunks.append(chunk)
+                if elapsed() > timeout:
+                    response.close()
+                    raise requests.exceptions.ReadTimeout(f"Reading {url} took more than {timeout:.1f} seconds")
+            response._content = b"".join(chunks)
+        except requests.exceptions.Timeout:
+            tracker.record(host, timeout, timed_out=True)
+            raise
+        tracker.record(host, elapsed())
+        return response
+
+    delay = tracker.get_hedge_delay(host) if hedge_executor else None
+    if delay is None:
+        return attempt()
+    response, hedged, hedge_won = hedged_call(attempt, delay, hedge_executor)
+    if hedged:
+        tracker.record_hedge(hedge_won)
+    return response
@@ -1,67 +1,16 @@
-
+import base64
+import gzip
 import html
+import json
 from datetime import datetime
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
 import tzlocal
 
-from link import Link
+from link import Link, LinkStatus
 from report import Report
 
-
-class HtmlReport(Report):
-    def generate(
-        self,
-        target_url: str,
-        broken_links: list[Any],
-        fetch_error_links: list[Any],
-        execution_time: str,
-        visited_urls_num: int,
-        thread_num: int
-    ) -> str:
-        local_time = datetime.now(tzlocal.get_localzone())
-        formatted_time = local_time.strftime('%Y-%m-%d %H:%M:%S %Z%z')
-        return self._build_html(target_url, broken_links, fetch_error_links, execution_time, visited_urls_num,
-                                thread_num, formatted_time)
-
-    @staticmethod
-    def _build_html(
-        target_url: str,
-        broken_links: List[Link],
-        fetch_error_links: List[Link],
-        execution_time: str,
-        visited_urls_num: int,
-        thread_num: int,
-        generated_at: str
-    ) -> str:
-        def render_table(links, title, show_status, show_error):
-            headers = "<th>#</th><th>URL</th><th>Depth</th><th>Appeared In</th>"
-            if show_status:
-                headers += "<th>Status</th>"
-            if show_error:
-                headers += "<th>Error</th>"
-
-            rows = ""
-            for idx, link in enumerate(links, 1):
-                row = "<tr><td>{}</td>".format(idx)
-                row += "<td><a href='{0}' target='_blank'>{0}</a></td>".format(html.escape(link.url))
-                row += "<td>{}</td>".format(link.depth)
-                row += "<td><a href='{0}' target='_blank'>{0}</a></td>".format(html.escape(link.first_found_on))
-                if show_status:
-                    row += "<td>{}</td>".format(html.escape(link.status.name.lower()))
-                if show_error:
-                    row += "<td>{}</td>".format(html.escape(str(link.error)))
-                row += "</tr>"
-                rows += row
-
-            return "<h2>{}</h2><table class='styled-table'><thead><tr>{}</tr></thead><tbody>{}</tbody></table>".format(title, headers, rows)
-
-        html_report = """<!DOCTYPE html>
-<html lang='en'>
-<head>
-    <meta charset='UTF-8'>
-    <title>Broken Links Crawler Report</title>
-    <style>
+STYLE = """
         body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background-color: #f4f6f8;
@@ -114,20 +63,338 @@ class HtmlReport(Report):
         .meta p {
             margin: 8px 0;
         }
-    </style>
-</head>
-<body>
-    <h1>Broken Links Crawler Report</h1>
+"""
+
+INTERACTIVE_STYLE = """
+        .controls > * {
+            margin-right: 10px;
+            padding: 6px;
+        }
+        #groups .styled-table {
+            width: auto;
+        }
+        #groups tbody tr {
+            cursor: pointer;
+        }
+        #groups tr.selected {
+            background-color: #c8ebe3;
+        }
+        .virtual-table {
+            table-layout: fixed;
+            margin: 0;
+        }
+        .virtual-table td {
+            height: 36px;
+            box-sizing: border-box;
+            padding: 0 15px;
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
+        }
+        .virtual-table tbody tr {
+            cursor: pointer;
+        }
+        #viewport {
+            height: 70vh;
+            overflow-y: auto;
+            position: relative;
+            background-color: #ffffff;
+        }
+        #spacer {
+            position: relative;
+        }
+        #rows {
+            position: absolute;
+            top: 0;
+        }
+        #details {
+            word-wrap: break-word;
+        }
+"""
+
+COLUMNS = """
+        <colgroup>
+            <col style='width: 7%'><col style='width: 33%'><col style='width: 6%'><col style='width: 28%'>
+            <col style='width: 8%'><col style='width: 18%'>
+        </colgroup>"""
+
+SCRIPT = """
+const ROW_HEIGHT = 36, PAGE_SIZE = 10000, OVERSCAN = 10, MAX_GROUPS = 100, MAX_LISTED = 1000;
+const HOST = /^[a-z][a-z0-9+.-]*:\\/\\/([^\\/?#]+)/i;
+const $ = id => document.getElementById(id);
+let data, section = [], rows = [], page = 0, groupKey = '', groupValue = null;
+
+function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, c => '&#' + c.charCodeAt(0) + ';');
+}
+
+function link(url) {
+    return `<a href="${escapeHtml(url)}" target="_blank" title="${escapeHtml(url)}">${escapeHtml(url)}</a>`;
+}
+
+// A row is [url, depth, appeared in, status, error, referrers, redirect chain], URLs are indexes in data.urls.
+function groupOf(row) {
+    if (groupKey === 'status') {
+        return row[4].includes(':') ? row[4].split(':')[0] : row[3];
+    }
+    const match = HOST.exec(data.urls[row[0]]);
+    return match ? match[1] : '';
+}
+
+async function loadData() {
+    const encoded = $('report-data').textContent.trim();
+    const response = await fetch('data:application/gzip;base64,' + encoded);
+    const text = await new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).text();
+    return JSON.parse(text);
+}
+
+function applyFilters() {
+    const needle = $('filter').value.toLowerCase();
+    rows = section.filter(row => (groupValue === null || groupOf(row) === groupValue)
+        && (!needle || data.urls[row[0]].toLowerCase().includes(needle)));
+    page = 0;
+    renderPage();
+}
+
+function selectSection() {
+    section = data.sections[$('section').value];
+    groupKey = $('group').value;
+    groupValue = null;
+    renderGroups();
+    applyFilters();
+}
+
+function renderGroups() {
+    if (!groupKey) {
+        $('groups').innerHTML = '';
+        return;
+    }
+    const counts = new Map();
+    for (const row of section) {
+        const group = groupOf(row);
+        counts.set(group, (counts.get(group) || 0) + 1);
+    }
+    const groups = [...counts].sort((a, b) => b[1] - a[1]).slice(0, MAX_GROUPS);
+    $('groups').innerHTML = `<table class='styled-table'><thead><tr><th>${groupKey}</th><th>Count</th></tr></thead><tbody>`
+        + groups.map(([group, count]) => `<tr data-group="${escapeHtml(group)}"${group === groupValue ? " class='selected'" : ''}>`
+            + `<td>${escapeHtml(group) || '&nbsp;'}</td><td>${count}</td></tr>`).join('')
+        + `</tbody></table>` + (counts.size > MAX_GROUPS ? `<p>${counts.size - MAX_GROUPS} smaller groups are not shown.</p>` : '');
+}
+
+function renderPage() {
+    const pages = Math.max(1, Math.ceil(rows.length / PAGE_SIZE));
+    $('page').textContent = ` Page ${page + 1} of ${pages}, ${rows.length} rows `;
+    $('prev').disabled = page === 0;
+    $('next').disabled = page >= pages - 1;
+    $('spacer').style.height = Math.min(PAGE_SIZE, rows.length - page * PAGE_SIZE) * ROW_HEIGHT + 'px';
+    $('viewport').scrollTop = 0;
+    renderVisibleRows();
+}
+
+function renderVisibleRows() {
+    const viewport = $('viewport');
+    const start = page * PAGE_SIZE;
+    const count = Math.min(PAGE_SIZE, rows.length - start);
+    const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const last = Math.min(count, Math.ceil((viewport.scrollTop + viewport.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+    const html = [];
+    for (let i = start + first; i < start + last; i++) {
+        const row = rows[i];
+        html.push(`<tr data-index="${i}"><td>${i + 1}</td><td>${link(data.urls[row[0]])}</td>`
+            + `<td>${row[1] === null ? 'inf' : row[1]}</td><td>${link(data.urls[row[2]])}</td>`
+            + `<td>${row[5].length || 1}</td><td title="${escapeHtml(row[4] || row[3])}">${escapeHtml(row[4] || row[3])}</td></tr>`);
+    }
+    $('rows').style.top = first * ROW_HEIGHT + 'px';
+    $('rows-body').innerHTML = html.join('');
+}
+
+function urlList(ids) {
+    const listed = ids.slice(0, MAX_LISTED).map(id => link(data.urls[id])).join('<br>');
+    return ids.length > MAX_LISTED ? listed + `<br>... and ${ids.length - MAX_LISTED} more` : listed;
+}
+
+function showDetails(row) {
+    const referrers = row[5].length ? row[5] : [row[2]];
+    let details = `<p><strong>URL:</strong> ${link(data.urls[row[0]])}</p><p><strong>Status:</strong> ${escapeHtml(row[3])}</p>`;
+    if (row[4]) {
+        details += `<p><strong>Error:</strong> ${escapeHtml(row[4])}</p>`;
+    }
+    if (row[6].length) {
+        details += `<p><strong>Redirects (${row[6].length - 1} hops):</strong><br>${urlList(row[6])}</p>`;
+    }
+    details += `<p><strong>Referrers (${referrers.length}):</strong><br>${urlList(referrers)}</p>`;
+    $('details').innerHTML = details;
+    $('details').hidden = false;
+}
+
+async function main() {
+    if (typeof DecompressionStream === 'undefined') {
+        $('loading').textContent = 'This report needs a browser supporting DecompressionStream.';
+        return;
+    }
+    data = await loadData();
+    $('loading').hidden = true;
+    $('app').hidden = false;
+    $('section').addEventListener('change', selectSection);
+    $('group').addEventListener('change', selectSection);
+    $('filter').addEventListener('input', applyFilters);
+    $('prev').addEventListener('click', () => { page--; renderPage(); });
+    $('next').addEventListener('click', () => { page++; renderPage(); });
+    $('viewport').addEventListener('scroll', () => requestAnimationFrame(renderVisibleRows));
+    $('groups').addEventListener('click', event => {
+        const row = event.target.closest('tr[data-group]');
+        if (row) {
+            groupValue = groupValue === row.dataset.group ? null : row.dataset.group;
+            renderGroups();
+            applyFilters();
+        }
+    });
+    $('rows-body').addEventListener('click', event => {
+        const row = event.target.closest('tr[data-index]');
+        if (row && event.target.tagName !== 'A') {
+            showDetails(rows[Number(row.dataset.index)]);
+        }
+    });
+    selectSection();
+}
+
+main();
+"""
+
+
+def render_meta(target_url: str, broken_links_num: int, fetch_error_links_num: int, execution_time: str,
+                visited_urls_num: int, thread_num: int, generated_at: str, run_stats: Dict[str, Any]) -> str:
+    return """    <h1>Broken Links Crawler Report</h1>
     <div class='meta'>
         <p><strong>Generated at:</strong> """ + generated_at + """</p>
         <p><strong>Execution Time:</strong> """ + execution_time + """</p>
         <p><strong>Target URL:</strong> <a href='""" + html.escape(target_url) + """' target='_blank'>""" + html.escape(target_url) + """</a></p>
         <p><strong>Visited URLs:</strong> """ + str(visited_urls_num) + """</p>
-        <p><strong>Broken URLs:</strong> """ + str(len(broken_links)) + """</p>
-        <p><strong>Fetch Error URLs:</strong> """ + str(len(fetch_error_links)) + """</p>
+        <p><strong>Broken URLs:</strong> """ + str(broken_links_num) + """</p>
+        <p><strong>Fetch Error URLs:</strong> """ + str(fetch_error_links_num) + """</p>
         <p><strong>Threads Used:</strong> """ + str(thread_num) + """</p>
+""" + "".join("        <p><strong>{}:</strong> {}</p>\n".format(html.escape(name.replace('_', ' ').title()),
+                                                              html.escape(str(value)))
+              for name, value in run_stats.items()) + """    </div>
+"""
+
+
+def get_generated_at() -> str:
+    local_time = datetime.now(tzlocal.get_localzone())
+    return local_time.strftime('%Y-%m-%d %H:%M:%S %Z%z')
+
+
+class HtmlReport(Report):
+    """
+    An HTML report that stays usable with any number of findings.
+
+    The findings are embedded once as gzip compressed, base64 encoded JSON, with each URL stored once. The
+    browser decompresses them with DecompressionStream and only puts the rows visible on screen in the page,
+    so the report opens quickly even with a million findings. Rows can be filtered, grouped by status or by
+    host and paged through, and clicking a row shows its referrers and redirect chain.
+    """
+
+    def generate(
+        self,
+        target_url: str,
+        broken_links: list[Any],
+        fetch_error_links: list[Any],
+        execution_time: str,
+        visited_urls_num: int,
+        thread_num: int,
+        run_stats: Optional[dict[str, Any]] = None
+    ) -> str:
+        return self._build_html(target_url, broken_links, fetch_error_links, execution_time, visited_urls_num,
+                                thread_num, get_generated_at(), run_stats or {})
+
+    @staticmethod
+    def encode_findings(broken_links: List[Link], fetch_error_links: List[Link]) -> str:
+        """
+        Encode the findings as the data embedded in the report.
+
+        Args:
+            broken_links: The broken links.
+            fetch_error_links: The links that could not be fetched.
+
+        Returns:
+            The base64 encoded, gzip compressed JSON of the findings.
+        """
+        url_ids: Dict[str, int] = dict()
+        status_names = {status: status.name.lower() for status in LinkStatus}
+
+        def url_id(url: str) -> int:
+            result = url_ids.get(url)
+            if result is None:
+                result = url_ids[url] = len(url_ids)
+            return result
+
+        def encode(links: List[Link]) -> list:
+            rows = []
+            for link in links:
+                # The referrers are omitted when the page the link was first found on is the only one.
+                referrers = link.referrers
+                if len(referrers) == 1 and referrers[0] == link.first_found_on:
+                    referrers = ()
+                rows.append([url_id(link.url), link.depth if link.depth != float("inf") else None,
+                             url_id(link.first_found_on), status_names[link.status], link.error,
+                             [url_id(url) for url in referrers] if referrers else (),
+                             [url_id(url) for url in link.redirect_chain] if link.redirect_chain else ()])
+            return rows
+
+        sections = [encode(broken_links), encode(fetch_error_links)]
+        data = json.dumps({"urls": list(url_ids), "sections": sections}, separators=(",", ":"))
+        return base64.b64encode(gzip.compress(data.encode("utf-8"), compresslevel=6)).decode("ascii")
+
+    @staticmethod
+    def _build_html(
+        target_url: str,
+        broken_links: List[Link],
+        fetch_error_links: List[Link],
+        execution_time: str,
+        visited_urls_num: int,
+        thread_num: int,
+        generated_at: str,
+        run_stats: dict[str, Any]
+    ) -> str:
+        return """<!DOCTYPE html>
+<html lang='en'>
+<head>
+    <meta charset='UTF-8'>
+    <title>Broken Links Crawler Report</title>
+    <style>""" + STYLE + INTERACTIVE_STYLE + """    </style>
+</head>
+<body>
+""" + render_meta(target_url, len(broken_links), len(fetch_error_links), execution_time, visited_urls_num,
+                  thread_num, generated_at, run_stats) + """    <p id='loading'>Loading the findings...</p>
+    <noscript><p>This report needs JavaScript to display the findings.</p></noscript>
+    <div id='app' hidden>
+        <div class='controls'>
+            <select id='section'>
+                <option value='0'>Broken URLs (""" + str(len(broken_links)) + """)</option>
+                <option value='1'>Fetch Error URLs (""" + str(len(fetch_error_links)) + """)</option>
+            </select>
+            <select id='group'>
+                <option value=''>No grouping</option>
+                <option value='status'>Group by status</option>
+                <option value='host'>Group by host</option>
+            </select>
+            <input id='filter' type='search' placeholder='Filter URLs'>
+            <button id='prev'>Previous</button><span id='page'></span><button id='next'>Next</button>
+        </div>
+        <div id='groups'></div>
+        <table class='styled-table virtual-table'>""" + COLUMNS + """
+            <thead><tr><th>#</th><th>URL</th><th>Depth</th><th>Appeared In</th><th>Referrers</th><th>Status / Error</th></tr></thead>
+        </table>
+        <div id='viewport'>
+            <div id='spacer'>
+                <table id='rows' class='styled-table virtual-table'>""" + COLUMNS + """
+                    <tbody id='rows-body'></tbody>
+                </table>
+            </div>
+        </div>
+        <div id='details' class='meta' hidden></div>
     </div>
-""" + render_table(broken_links, "Broken URLs", show_status=True, show_error=False) + render_table(fetch_error_links, "Fetch Error URLs", show_status=False, show_error=True) + """
+    <script id='report-data' type='application/octet-stream'>""" + HtmlReport.encode_findings(broken_links, fetch_error_links) + """</script>
+    <script>""" + SCRIPT + """    </script>
 </body>
 </html>"""
-        return html_report
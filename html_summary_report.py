@@ -0,0 +1,91 @@
+import html
+from collections import Counter
+from typing import Any, Callable, List, Optional
+
+from html_report import STYLE, get_generated_at, render_meta
+from link import Link
+from report import Report
+
+
+class HtmlSummaryReport(Report):
+    """
+    A static HTML report of bounded size, meant to be sent by email.
+
+    Email clients do not run scripts and clip large messages, so this report has no script and stops listing
+    findings once it reaches MAX_SIZE. The counts of findings by status and by host always cover all of them.
+    """
+
+    MAX_SIZE = 100 * 1024
+    TOP_HOSTS = 20
+
+    def generate(
+        self,
+        target_url: str,
+        broken_links: List[Link],
+        fetch_error_links: List[Link],
+        execution_time: str,
+        visited_urls_num: int,
+        thread_num: int,
+        run_stats: Optional[dict[str, Any]] = None
+    ) -> str:
+        head = """<!DOCTYPE html>
+<html lang='en'>
+<head>
+    <meta charset='UTF-8'>
+    <title>Broken Links Crawler Report</title>
+    <style>""" + STYLE + """    </style>
+</head>
+<body>
+""" + render_meta(target_url, len(broken_links), len(fetch_error_links), execution_time, visited_urls_num,
+                  thread_num, get_generated_at(), run_stats or {})
+        tail = """
+</body>
+</html>"""
+
+        all_links = broken_links + fetch_error_links
+        body = self._render_counts("Findings by status", all_links, lambda link: link.status.name.lower())
+        body += self._render_counts(f"Top {self.TOP_HOSTS} hosts", all_links, lambda link: link.url.split("/", 3)[2],
+                                    self.TOP_HOSTS)
+
+        size = len(head) + len(body) + len(tail)
+        for links, title, show_status in ((broken_links, "Broken URLs", True),
+                                          (fetch_error_links, "Fetch Error URLs", False)):
+            table = self._render_table(links, title, show_status, self.MAX_SIZE - size)
+            body += table
+            size += len(table)
+        return head + body + tail
+
+    @staticmethod
+    def _render_counts(title: str, links: List[Link], key: Callable[[Link], str], limit: Optional[int] = None) -> str:
+        if not links:
+            return ""
+        rows = "".join("<tr><td>{}</td><td>{}</td></tr>".format(html.escape(name), count)
+                       for name, count in Counter(map(key, links)).most_common(limit))
+        return ("<h2>{}</h2><table class='styled-table'><thead><tr><th>Name</th><th>Count</th></tr></thead>"
+                "<tbody>{}</tbody></table>").format(title, rows)
+
+    @staticmethod
+    def _render_table(links: List[Link], title: str, show_status: bool, available_size: int) -> str:
+        headers = "<th>#</th><th>URL</th><th>Appeared In</th><th>Referrers</th>"
+        headers += "<th>Status</th>" if show_status else "<th>Error</th>"
+        table_start = "<h2>{}</h2><table class='styled-table'><thead><tr>{}</tr></thead><tbody>".format(title, headers)
+        table_end = "</tbody></table>"
+        # Room for the note about the findings that are not listed.
+        available_size -= len(table_start) + len(table_end) + 200
+
+        rows = []
+        for idx, link in enumerate(links, 1):
+            row = "<tr><td>{}</td>".format(idx)
+            row += "<td><a href='{0}'>{0}</a></td>".format(html.escape(link.url))
+            row += "<td><a href='{0}'>{0}</a></td>".format(html.escape(link.first_found_on))
+            row += "<td>{}</td>".format(max(len(link.referrers), 1))
+            row += "<td>{}</td></tr>".format(html.escape(link.status.name.lower() if show_status else str(link.error)))
+            available_size -= len(row)
+            if available_size < 0:
+                break
+            rows.append(row)
+
+        note = ""
+        if len(rows) < len(links):
+            note = "<p>{} more {} are listed in the full report.</p>".format(len(links) - len(rows), title.lower())
+        return table_start + "".join(rows) + table_end + note if links else ""
@@ -1,6 +1,6 @@
 
 from datetime import datetime
-from typing import List
+from typing import Any, List, Optional
 
 import tzlocal
 from loguru import logger
@@ -17,7 +17,8 @@ class HumanReport(Report):
             fetch_error_links: List[Link],
             execution_time: str,
             visited_urls_num: int,
-            thread_num: int
+            thread_num: int,
+            run_stats: Optional[dict[str, Any]] = None
     ) -> str:
         local_time = datetime.now(tzlocal.get_localzone())
         formatted_time = local_time.strftime('%Y-%m-%d %H:%M:%S %Z%z')
@@ -31,6 +32,8 @@ class HumanReport(Report):
         report += f"Broken URLs      : {len(broken_links)}\n"
         report += f"Fetch Error URLs : {len(fetch_error_links)}\n"
         report += f"Threads Used     : {thread_num}\n"
+        for name, value in (run_stats or {}).items():
+            report += f"{name.replace('_', ' ').title():<17}: {value}\n"
         report += "=" * 60 + "\n\n"
 
         def format_section(links: List[Link], title: str, include_status: bool, include_error: bool) -> str:
@@ -39,10 +42,15 @@ class HumanReport(Report):
                 section += f"[{i}] URL         : {link.url}\n"
                 section += f"     Depth       : {link.depth}\n"
                 section += f"     Appeared In : {link.first_found_on}\n"
+                if link.referrers:
+                    section += f"     Referrers   : {len(link.referrers)}\n"
+                    section += "".join(f"                   {referrer}\n" for referrer in link.referrers)
                 if include_status:
                     section += f"     Status      : {link.status.name.lower()}\n"
                 if include_error:
                     section += f"     Error       : {link.error}\n"
+                if link.redirect_chain:
+                    section += f"     Redirects   : {link.get_redirect_hops()} hops, {' -> '.join(link.redirect_chain)}\n"
                 section += "-" * 60 + "\n"
             return section + "\n"
 
@@ -1,7 +1,7 @@
 
 import json
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, List, Optional
 
 from loguru import logger
 
@@ -17,18 +17,24 @@ class JsonReport(Report):
             fetch_error_links: List[Link],
             execution_time: str,
             visited_urls_num: int,
-            thread_num: int
+            thread_num: int,
+            run_stats: Optional[dict[str, Any]] = None
     ) -> str | None:
         def serialize_link(link: Link, include_status=True, include_error=True) -> dict:
             result = {
                 "url": link.url,
                 "depth": link.depth,
                 "appeared_in": link.first_found_on,
+                "referrers_num": len(link.referrers),
+                "referrers": link.referrers,
             }
             if include_status:
                 result["status"] = link.status.name.lower()
             if include_error:
                 result["error"] = link.error
+            if link.redirect_chain:
+                result["redirect_chain"] = link.redirect_chain
+                result["redirect_hops"] = link.get_redirect_hops()
             return result
 
         report = {
@@ -37,6 +43,7 @@ class JsonReport(Report):
             "target_url": target_url,
             "visited_urls": visited_urls_num,
             "threads_used": thread_num,
+            "run_stats": run_stats or {},
             "broken_links": [serialize_link(link, include_status=True, include_error=False) for link in broken_links],
             "fetch_errors": [serialize_link(link, include_status=False, include_error=True) for link in fetch_error_links]
         }
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Any
+from typing import Any, List, Optional
 
 
 class LinkStatus(Enum):
@@ -10,6 +10,7 @@ class LinkStatus(Enum):
     NO_SUCH_PAGE = 2
     HTTP_INSTEAD_OF_HTTPS = 3
     OTHER_ERROR = 4
+    SOFT_404 = 5
 
 
 class Link:
@@ -21,7 +22,9 @@ class Link:
             depth: int,
             first_found_on: str,
             status: LinkStatus = LinkStatus.NOT_VISITED,
-            error: str = ''
+            error: str = '',
+            redirect_chain: Optional[List[str]] = None,
+            referrers: Optional[List[str]] = None
     ):
         """
         Initialize a Link object.
@@ -32,12 +35,25 @@ class Link:
             first_found_on: URL where this link was first found.
             status: Status of the link.
             error: Error message if any.
+            redirect_chain: The URL as it was linked, followed by every URL it redirects to.
+            referrers: All the pages linking to this link, filled in for the findings when the crawl is over.
         """
         self.url = url
         self.depth = depth
         self.first_found_on = first_found_on
         self.status = status
         self.error = error
+        self.redirect_chain = redirect_chain if redirect_chain else []
+        self.referrers = referrers if referrers else []
+
+    def get_redirect_hops(self) -> int:
+        return max(len(self.redirect_chain) - 1, 0)
+
+    def get_linked_urls(self) -> List[str]:
+        """Return the URL, preceded by the URL it was linked with if it was rewritten from a known redirect."""
+        if self.redirect_chain and self.redirect_chain[0] != self.url:
+            return [self.redirect_chain[0], self.url]
+        return [self.url]
 
     def __eq__(self, other: Any) -> bool:
         return isinstance(other, Link) and self.url == other.url
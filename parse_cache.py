@@ -0,0 +1,104 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import FrozenSet, Optional, Tuple
+
+ParsedPage = Tuple[Tuple[str, ...], FrozenSet[str]]
+
+
+class ParseCache:
+    """
+    A bounded LRU cache of parsed pages keyed by a hash of the response body.
+
+    Each entry holds the raw hrefs and the anchors of a page, so a page whose body was already parsed
+    under another URL only needs its hrefs resolved against the new URL. Entries can optionally be
+    persisted to a SQLite file to be reused by later crawls.
+    """
+
+    DEFAULT_SIZE = 10000
+
+    def __init__(self, max_entries: int = DEFAULT_SIZE, path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of pages kept in memory.
+            path: Optional SQLite file backing the in-memory cache.
+        """
+        self.max_entries = max_entries
+        self.entries: OrderedDict[bytes, ParsedPage] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = None
+        if path:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages (key BLOB PRIMARY KEY, hrefs TEXT NOT NULL, anchors TEXT NOT NULL)"
+            )
+
+    @staticmethod
+    def key(body: bytes) -> bytes:
+        return hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[ParsedPage]:
+        """
+        Look up a parsed page.
+
+        Args:
+            key: The hash of the response body.
+
+        Returns:
+            The hrefs and anchors of the page, or None if the body was not parsed before.
+        """
+        with self.lock:
+            page = self.entries.get(key)
+            if page is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return page
+
+            if self.connection:
+                row = self.connection.execute("SELECT hrefs, anchors FROM pages WHERE key = ?", (key,)).fetchone()
+                if row:
+                    page = (tuple(json.loads(row[0])), frozenset(json.loads(row[1])))
+                    self._store(key, page)
+                    self.hits += 1
+                    return page
+
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, page: ParsedPage) -> None:
+        """
+        Store a parsed page.
+
+        Args:
+            key: The hash of the response body.
+            page: The hrefs and anchors of the page.
+        """
+        with self.lock:
+            self._store(key, page)
+            if self.connection:
+                self.connection.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                                        (key, json.dumps(page[0]), json.dumps(sorted(page[1]))))
+
+    def _store(self, key: bytes, page: ParsedPage) -> None:
+        self.entries[key] = page
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+
+    def close(self) -> None:
+        with self.lock:
+            if self.connection:
+                self.connection.commit()
+                self.connection.close()
+                self.connection = None
@@ -0,0 +1,75 @@
+import heapq
+import itertools
+from typing import Any, Callable, Dict, Iterable, List
+
+from batch_queue import BatchQueue
+
+
+class PriorityFrontier(BatchQueue):
+    """
+    A queue handing out the most important pending task first.
+
+    The priority of a task is computed by `priority_fn(task, inbound)`, where `inbound` counts how many
+    times the task was seen while pending. Lower values come first. When a pending task is seen again,
+    it is pushed again with its new priority and the old heap entry is discarded lazily.
+    """
+
+    def __init__(self, priority_fn: Callable[[Any, int], tuple]):
+        self.priority_fn = priority_fn
+        super().__init__()
+
+    def _init(self, maxsize: int) -> None:
+        self._heap: List[list] = []
+        self._entries: Dict[Any, list] = dict()
+        self._inbound: Dict[Any, int] = dict()
+        self._counter = itertools.count()
+        self._size = 0
+
+    def _qsize(self) -> int:
+        return self._size
+
+    def _put(self, item: Any) -> None:
+        self._size += 1
+        if item is None:
+            # Stop signals are only sent to an empty queue, they just go last.
+            heapq.heappush(self._heap, [(float("inf"),), next(self._counter), None, True])
+            return
+        self._inbound[item] = 1
+        self._push(item)
+
+    def _push(self, item: Any) -> None:
+        entry = [self.priority_fn(item, self._inbound[item]), next(self._counter), item, True]
+        self._entries[item] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _get(self) -> Any:
+        while True:
+            _, _, item, valid = heapq.heappop(self._heap)
+            if valid:
+                break
+        self._size -= 1
+        if item is not None:
+            del self._entries[item]
+            del self._inbound[item]
+        return item
+
+    def note_sightings(self, items: Iterable[Any]) -> None:
+        """
+        Raise the inbound count of the pending items among the given ones and update their priority.
+
+        Args:
+            items: Items seen again, items that are not pending are ignored.
+        """
+        with self.mutex:
+            counts: Dict[Any, int] = dict()
+            for item in items:
+                if item in self._entries:
+                    counts[item] = counts.get(item, 0) + 1
+            for item, count in counts.items():
+                self._entries[item][3] = False
+                self._inbound[item] += count
+                self._push(item)
+
+            if len(self._heap) > 4 * self._size + 1024:
+                self._heap = [entry for entry in self._heap if entry[3]]
+                heapq.heapify(self._heap)
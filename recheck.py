@@ -0,0 +1,169 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from urllib.parse import urldefrag, unquote
+
+import requests
+from loguru import logger
+
+from crawler import Crawler, normalize_url
+from host_latency import timed_request
+from link import Link, LinkStatus
+from processor import Processor
+from worker_manager import WorkerManager
+
+
+class RecheckOutcome:
+    FIXED = "fixed"
+    STILL_BROKEN = "still_broken"
+    CHANGED = "changed"
+
+
+class Finding:
+    """A finding of a previous JSON report and the result of checking it again."""
+
+    def __init__(self, url: str, depth: Any, appeared_in: str, status: str, error: str = ""):
+        self.url = url
+        self.depth = depth
+        self.appeared_in = appeared_in
+        self.previous_status = status
+        self.previous_error = error
+        self.current_status = ""
+        self.current_error = ""
+        self.outcome = ""
+        self.note = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "url": self.url,
+            "appeared_in": self.appeared_in,
+            "outcome": self.outcome,
+            "previous_status": self.previous_status,
+            "current_status": self.current_status,
+        }
+        if self.previous_error or self.current_error:
+            result["previous_error"] = self.previous_error
+            result["current_error"] = self.current_error
+        if self.note:
+            result["note"] = self.note
+        return result
+
+
+class RecheckProcessor(Processor):
+    """Checks findings again using the same classification as the crawl."""
+
+    def __init__(self, target_url: str, verify_referrers: bool):
+        # With max_depth 0, internal pages are only checked with HEAD, as the crawl does at the depth limit.
+        self.crawler = Crawler(target_url, 0)
+        self.verify_referrers = verify_referrers
+
+    def process(self, task: Finding) -> List[Any]:
+        logger.debug(f'Rechecking {task.url}')
+        url, fragment = urldefrag(task.url)
+        needs_body = bool(fragment) or task.previous_status == LinkStatus.SOFT_404.name.lower()
+        # A depth different from max_depth makes fetch_url GET internal pages, which soft 404 and fragments need.
+        link = Link(url, -1 if needs_body else 0, task.appeared_in)
+        response = self.crawler.fetch_url(link, self.crawler.transport.session)
+
+        task.current_status = link.status.name.lower() if link.status != LinkStatus.NOT_VISITED else "ok"
+        task.current_error = link.error
+        if fragment and response is not None:
+            _, anchors = self.crawler.parse_page(response.content)
+            if unquote(fragment) not in anchors:
+                task.current_status = LinkStatus.OTHER_ERROR.name.lower()
+                task.current_error = f"Fragment {unquote(fragment)} does not exist the page."
+
+        if task.current_status == "ok":
+            task.outcome = RecheckOutcome.FIXED
+        elif task.current_status == task.previous_status:
+            task.outcome = RecheckOutcome.STILL_BROKEN
+        else:
+            task.outcome = RecheckOutcome.CHANGED
+
+        if self.verify_referrers and task.outcome != RecheckOutcome.FIXED:
+            self._verify_referrer(task)
+        return []
+
+    def _verify_referrer(self, task: Finding) -> None:
+        if not task.appeared_in.startswith("http"):
+            return
+        try:
+            response = timed_request(self.crawler.transport.session, "GET", task.appeared_in,
+                                     self.crawler.latency_tracker, verify=False, allow_redirects=True)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            task.note = f"Could not fetch {task.appeared_in}: {e}"
+            return
+
+        hrefs, _ = self.crawler.parse_page(response.content)
+        linked_urls = {normalize_url(requests.compat.urljoin(task.appeared_in, href)) for href in hrefs}
+        if task.url not in linked_urls:
+            task.outcome = RecheckOutcome.CHANGED
+            task.note = f"No longer linked from {task.appeared_in}"
+
+    def finalize(self) -> None:
+        logger.debug('Finalizing')
+
+    def initiate(self) -> None:
+        logger.debug('Initiating')
+
+
+def load_findings(report_path: str) -> tuple[str, List[Finding]]:
+    """
+    Load the findings of a JSON report.
+
+    Args:
+        report_path: Path to a report generated by JsonReport.
+
+    Returns:
+        The target URL of the report and its findings.
+    """
+    with open(report_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+
+    findings = [Finding(link["url"], link["depth"], link["appeared_in"], link["status"])
+                for link in report.get("broken_links", [])]
+    findings += [Finding(link["url"], link["depth"], link["appeared_in"], LinkStatus.OTHER_ERROR.name.lower(),
+                         link.get("error", ""))
+                 for link in report.get("fetch_errors", [])]
+    return report["target_url"], findings
+
+
+def recheck(report_path: str, output_path: str, threads_num: int, verify_referrers: bool = False) -> Optional[dict]:
+    """
+    Check the findings of a previous JSON report again and write a report of what changed.
+
+    Args:
+        report_path: Path to a report generated by JsonReport.
+        output_path: Path of the recheck report to write.
+        threads_num: Number of threads to check with.
+        verify_referrers: Whether to also check that the pages the findings appeared in still link to them.
+
+    Returns:
+        The recheck report, or None if the report has no findings.
+    """
+    target_url, findings = load_findings(report_path)
+    if not findings:
+        logger.info(f"{report_path} has no findings to recheck.")
+        return None
+
+    processor = RecheckProcessor(target_url, verify_referrers)
+    manager = WorkerManager(first_task=findings[0], processor=processor, threads_num=min(threads_num, len(findings)),
+                            repeat_task=False, initial_tasks=findings[1:])
+    manager.start()
+    manager.end()
+    processor.crawler.resources.close()
+
+    summary = {outcome: sum(1 for finding in findings if finding.outcome == outcome)
+               for outcome in (RecheckOutcome.FIXED, RecheckOutcome.STILL_BROKEN, RecheckOutcome.CHANGED)}
+    report = {
+        "report_generated_at": datetime.now(timezone.utc).isoformat(),
+        "source_report": report_path,
+        "target_url": target_url,
+        "summary": summary,
+        "findings": [finding.to_dict() for finding in findings],
+    }
+    with open(output_path, "w") as f:
+        f.write(json.dumps(report, indent=4))
+    logger.info(f"Recheck report {output_path} generated: {summary}")
+    return report
@@ -0,0 +1,153 @@
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+
+class RedirectRule:
+    """A learned prefix rewrite, e.g. http://example.com/ -> https://www.example.com/."""
+
+    def __init__(self, target_prefix: str):
+        self.target_prefix = target_prefix
+        self.sources: Set[str] = set()
+        self.conflicting = False
+        self.verified = False
+
+    def is_active(self) -> bool:
+        return not self.conflicting and len(self.sources) >= RedirectCache.MIN_OBSERVATIONS
+
+    def is_applicable(self) -> bool:
+        return self.is_active() and self.verified
+
+
+class RedirectCache:
+    """
+    A shared cache of the redirects observed while crawling.
+
+    Every redirect chain is remembered for its source URL. Each hop is also generalized into a prefix
+    rule when the source and target share the same path tail, as site-wide redirects do (http to https,
+    apex to www, moved path prefixes). Only scheme and host changes are generalized to a whole site,
+    path rules need a prefix of at least one segment, and hops to a URL with a query, like a login page
+    with a return URL, or to a URL under the source prefix, are never generalized.
+
+    A rule becomes active after it was observed for several different URLs and never contradicted, and
+    it is only applied once it correctly predicted the redirect of another URL that was actually fetched.
+    """
+
+    MIN_OBSERVATIONS = 2
+
+    def __init__(self):
+        self.chains: Dict[str, List[str]] = dict()
+        self.rules: Dict[str, RedirectRule] = dict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _split_hop(source: str, target: str) -> Optional[Tuple[str, str]]:
+        """Return the (source prefix, target prefix) of a hop keeping the same path tail, both ending with '/'."""
+        authority_length = RedirectCache._authority_length(source)
+        if authority_length is None or urlparse(target).query:
+            return None
+        tail_length = 0
+        while (tail_length < len(source) - authority_length and tail_length < len(target)
+               and source[-1 - tail_length] == target[-1 - tail_length]):
+            tail_length += 1
+        tail = source[len(source) - tail_length:]
+        if "/" not in tail:
+            return None
+        # Make the shared tail start on a path segment boundary.
+        tail = tail[tail.index("/"):]
+        source_prefix = source[:len(source) - len(tail) + 1]
+        target_prefix = target[:len(target) - len(tail) + 1]
+        if target_prefix.startswith(source_prefix):
+            return None
+        # A rule for the root of a site is only learned for scheme and host changes.
+        if len(source_prefix) == authority_length + 1 and urlparse(target_prefix).path != "/":
+            return None
+        return source_prefix, target_prefix
+
+    @staticmethod
+    def _authority_length(url: str) -> Optional[int]:
+        """Return the length of the scheme and host part of a URL, None if it has none."""
+        parsed = urlparse(url)
+        if not parsed.scheme or not parsed.netloc:
+            return None
+        return len(f"{parsed.scheme}://{parsed.netloc}")
+
+    @staticmethod
+    def _prefixes(url: str) -> List[str]:
+        """Return the prefixes of a URL ending with '/', the most specific first."""
+        authority_length = RedirectCache._authority_length(url)
+        if authority_length is None:
+            return []
+        path_end = authority_length + len(urlparse(url).path)
+        return [url[:index + 1] for index in range(path_end - 1, authority_length - 1, -1) if url[index] == "/"]
+
+    def _find_rule(self, url: str) -> Optional[Tuple[str, RedirectRule]]:
+        """Return the rule of the most specific prefix of a URL having one, with the prefix."""
+        for prefix in self._prefixes(url):
+            rule = self.rules.get(prefix)
+            if rule:
+                return prefix, rule
+        return None
+
+    def _verify(self, chain: List[str]) -> None:
+        """Check the rule matching the first URL of an observed chain against what was observed."""
+        found = self._find_rule(chain[0])
+        if found is None:
+            return
+        prefix, rule = found
+        if not rule.is_active() or chain[0] in rule.sources:
+            return
+        if len(chain) > 1 and chain[1] == rule.target_prefix + chain[0][len(prefix):]:
+            rule.verified = True
+        else:
+            rule.conflicting = True
+
+    def _learn(self, chain: List[str]) -> None:
+        self.chains[chain[0]] = chain
+        for source, target in zip(chain, chain[1:]):
+            hop = self._split_hop(source, target)
+            if hop is None:
+                continue
+            source_prefix, target_prefix = hop
+            rule = self.rules.setdefault(source_prefix, RedirectRule(target_prefix))
+            if rule.target_prefix != target_prefix:
+                rule.conflicting = True
+            elif len(rule.sources) < self.MIN_OBSERVATIONS:
+                rule.sources.add(source)
+
+    def record(self, chain: List[str]) -> None:
+        """
+        Record an observed redirect chain.
+
+        Args:
+            chain: The requested URL, followed by every URL it was redirected to. A URL that did not redirect
+                is recorded alone, to check the rules that would have rewritten it.
+        """
+        with self.lock:
+            if len(chain) > 1:
+                self._learn(chain)
+            self._verify(chain)
+
+    def resolve(self, url: str) -> Optional[List[str]]:
+        """
+        Predict the redirect chain of a URL without fetching it.
+
+        Args:
+            url: The URL to resolve.
+
+        Returns:
+            The known or predicted chain starting with the URL, or None if it is not expected to redirect.
+        """
+        with self.lock:
+            chain = self.chains.get(url)
+            if chain is None:
+                found = self._find_rule(url)
+                if found is not None and found[1].is_applicable():
+                    prefix, rule = found
+                    chain = [url, rule.target_prefix + url[len(prefix):]]
+            return chain
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            active_rules = sum(1 for rule in self.rules.values() if rule.is_applicable())
+            return {"chains": len(self.chains), "rules": active_rules}
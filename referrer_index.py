@@ -0,0 +1,72 @@
+import threading
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class ReferrerIndex:
+    """
+    Every link edge of a crawl, to find all the pages linking to a URL.
+
+    URLs are mapped to integer ids and the edges are appended to two flat arrays of ids, 8 bytes per edge.
+    Referrers are only needed for the findings, once the crawl is over, so they are looked up in a single
+    pass over the edges instead of keeping a list per URL.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = dict()
+        self.urls: List[str] = []
+        self.sources = array("I")
+        self.targets = array("I")
+        self.lock = threading.Lock()
+
+    def _get_id(self, url: str) -> int:
+        url_id = self.ids.get(url)
+        if url_id is None:
+            url_id = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+        return url_id
+
+    def add_edges(self, source: str, targets: Iterable[str]) -> None:
+        """
+        Record the links found on a page.
+
+        Args:
+            source: The URL of the page.
+            targets: The URLs linked from the page, a target linked several times is recorded once.
+        """
+        with self.lock:
+            source_id = self._get_id(source)
+            target_ids = [self._get_id(target) for target in dict.fromkeys(targets)]
+            self.sources.extend([source_id] * len(target_ids))
+            self.targets.extend(target_ids)
+
+    def get_referrers(self, urls: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Find the pages linking to each of the given URLs.
+
+        Args:
+            urls: The URLs to look up.
+
+        Returns:
+            The referrers of each URL, in the order the pages were parsed. URLs without referrers are omitted.
+        """
+        with self.lock:
+            wanted = {self.ids[url]: [] for url in urls if url in self.ids}
+            if wanted:
+                for source_id, target_id in zip(self.sources, self.targets):
+                    if target_id in wanted:
+                        wanted[target_id].append(source_id)
+            return {self.urls[target_id]: [self.urls[source_id] for source_id in source_ids]
+                    for target_id, source_ids in wanted.items() if source_ids}
+
+    def iter_edges(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """Yield the edges from start to stop as (source id, target id), the URL of an id is urls[id]."""
+        return zip(self.sources[start:stop], self.targets[start:stop])
+
+    def get_sizes(self) -> Tuple[int, int]:
+        """Return the number of URLs and of edges, the URLs of the counted edges are all counted."""
+        with self.lock:
+            return len(self.urls), len(self.targets)
+
+    def __len__(self) -> int:
+        return len(self.targets)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional
 
 
 class Report(ABC):
@@ -13,6 +13,7 @@ class Report(ABC):
             other_error_links: list[Any],
             execution_time: str,
             visited_urls_num: int,
-            thread_num: int
+            thread_num: int,
+            run_stats: Optional[dict[str, Any]] = None
     ) -> str:
         pass
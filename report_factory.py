@@ -1,6 +1,7 @@
 import enum
 
 from html_report import HtmlReport
+from html_summary_report import HtmlSummaryReport
 from human_report import HumanReport
 from json_report import JsonReport
 from report import Report
@@ -10,6 +11,7 @@ class ReportType(enum.Enum):
     HUMAN = "human"
     JSON = "json"
     HTML = "html"
+    HTML_SUMMARY = "html_summary"
 
 
 class ReportFactory:
@@ -33,3 +35,5 @@ class ReportFactory:
                 return JsonReport()
             case ReportType.HTML.value:
                 return HtmlReport()
+            case ReportType.HTML_SUMMARY.value:
+                return HtmlSummaryReport()
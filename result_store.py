@@ -0,0 +1,135 @@
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+from loguru import logger
+
+from link import Link, LinkStatus
+
+
+class ResultStore:
+    """
+    A SQLite file holding the findings, the link graph edges and the metadata of a crawl.
+
+    Reports can be rendered again from the store without re-crawling. Each crawl replaces the
+    content of the store it writes to, and commits its findings as it goes, so the reports of a crawl
+    that crashed can still be rendered from what it found.
+    """
+
+    DEFAULT_PATH = "results.db"
+
+    BROKEN = "broken"
+    FETCH_ERROR = "fetch_error"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS run (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS urls (id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL);
+        CREATE TABLE IF NOT EXISTS edges (source INTEGER NOT NULL, target INTEGER NOT NULL);
+        CREATE INDEX IF NOT EXISTS edges_target ON edges (target);
+        CREATE TABLE IF NOT EXISTS findings (
+            kind TEXT NOT NULL,
+            url TEXT NOT NULL,
+            depth REAL,
+            appeared_in TEXT,
+            status TEXT,
+            error TEXT,
+            redirect_chain TEXT
+        );
+    """
+
+    REFERRERS_QUERY = ("SELECT s.url FROM edges JOIN urls AS t ON t.id = edges.target "
+                       "JOIN urls AS s ON s.id = edges.source WHERE t.url = ? ORDER BY edges.rowid")
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(self.SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(findings)")}
+        if "redirect_chain" not in columns:
+            # Stores created before redirect chains were recorded.
+            self.connection.execute("ALTER TABLE findings ADD COLUMN redirect_chain TEXT")
+        self.lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Remove the content of a previous crawl."""
+        with self.lock:
+            self.connection.executescript("DELETE FROM run; DELETE FROM urls; DELETE FROM edges; DELETE FROM findings;")
+            self.connection.commit()
+
+    def save_edges(self, urls: List[str], edges: Iterable[Tuple[int, int]], first_url_id: int = 0) -> None:
+        """
+        Record a part of the link graph of the crawl, it is committed by the next save_run().
+
+        Args:
+            urls: The URLs of consecutive ids.
+            edges: The links as (source id, target id).
+            first_url_id: The id of the first URL.
+        """
+        with self.lock:
+            self.connection.executemany("INSERT INTO urls (id, url) VALUES (?, ?)", enumerate(urls, first_url_id))
+            self.connection.executemany("INSERT INTO edges (source, target) VALUES (?, ?)", edges)
+
+    def save_run(self, metadata: Dict[str, Any], broken_links: List[Link], fetch_error_links: List[Link]) -> None:
+        """
+        Add findings, update the metadata of the crawl and commit everything.
+
+        Args:
+            metadata: Run metadata, values are stored as strings.
+            broken_links: The broken links found since the last call.
+            fetch_error_links: The links that could not be fetched since the last call.
+        """
+        def rows(kind: str, links: List[Link]):
+            return [(kind, link.url, link.depth, link.first_found_on, link.status.name, link.error,
+                     json.dumps(link.redirect_chain) if link.redirect_chain else None) for link in links]
+
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO run (key, value) VALUES (?, ?)",
+                                        [(key, str(value)) for key, value in metadata.items()])
+            self.connection.executemany("INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                        rows(self.BROKEN, broken_links) + rows(self.FETCH_ERROR, fetch_error_links))
+            self.connection.commit()
+        logger.debug(f"Crawl results were stored in {self.path}.")
+
+    def load_metadata(self) -> Dict[str, str]:
+        with self.lock:
+            return dict(self.connection.execute("SELECT key, value FROM run"))
+
+    def load_links(self, kind: str) -> List[Link]:
+        """
+        Load stored findings.
+
+        Args:
+            kind: BROKEN or FETCH_ERROR.
+
+        Returns:
+            The findings as Link objects.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT url, depth, appeared_in, status, error, redirect_chain FROM findings WHERE kind = ? ORDER BY rowid",
+                (kind,)
+            ).fetchall()
+            links = [Link(url, int(depth) if depth != float("inf") else depth, appeared_in, LinkStatus[status], error,
+                          json.loads(redirect_chain) if redirect_chain else None)
+                     for url, depth, appeared_in, status, error, redirect_chain in rows]
+            for link in links:
+                referrers = dict()
+                for url in link.get_linked_urls():
+                    referrers.update((source, None) for source, in self.connection.execute(self.REFERRERS_QUERY, (url,)))
+                link.referrers = list(referrers) or [link.first_found_on]
+        return links
+
+    def load_finding_urls(self) -> set[str]:
+        """Return the URLs of all the stored findings."""
+        with self.lock:
+            return {url for url, in self.connection.execute("SELECT url FROM findings")}
+
+    def get_edges_num(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
@@ -0,0 +1,146 @@
+import re
+import threading
+import uuid
+from collections import defaultdict
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from loguru import logger
+
+from host_latency import LatencyTracker, timed_request
+
+
+def minhash(text: str, slots_num: int = 64) -> tuple[int, ...]:
+    """
+    Compute a one-permutation MinHash signature of the set of words of a text.
+
+    Every word is hashed once into one of the slots, and each slot keeps the minimal hash it received,
+    so the cost is linear in the text length and independent of the number of slots.
+
+    Args:
+        text: The text to fingerprint.
+        slots_num: Number of slots of the signature.
+
+    Returns:
+        The signature, with -1 marking empty slots.
+    """
+    signature = [-1] * slots_num
+    for word in set(re.findall(r"\w+", text.lower())):
+        word_hash = hash(word) & 0xFFFFFFFFFFFFFFFF
+        slot, value = word_hash % slots_num, word_hash // slots_num
+        if signature[slot] == -1 or value < signature[slot]:
+            signature[slot] = value
+    return tuple(signature)
+
+
+def similarity(signature: tuple[int, ...], other_signature: tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of the word sets behind two MinHash signatures."""
+    used = equal = 0
+    for value, other_value in zip(signature, other_signature):
+        if value != -1 or other_value != -1:
+            used += 1
+            equal += value == other_value
+    return equal / used if used else 1.0
+
+
+def page_text(html: str) -> str:
+    """Strip the tags of an HTML page, cheaply, without parsing it."""
+    html = re.sub(r"(?is)<(script|style)\b.*?</\1>", " ", html)
+    return re.sub(r"<[^>]+>", " ", html)
+
+
+class HostBaseline:
+    """The fingerprint of the page a host serves for a path that does not exist."""
+
+    def __init__(self, fingerprint: tuple[int, ...], landing_url: str, redirected: bool):
+        self.fingerprint = fingerprint
+        self.landing_url = landing_url
+        self.redirected = redirected
+
+
+class Soft404Detector:
+    """
+    Detects "False 200 OK" pages: error pages served with a success status.
+
+    The first time a host is seen, a random path that does not exist is requested once and the
+    fingerprint of the returned page is stored. Every page fetched from that host is then compared
+    with the stored fingerprint, without any extra request.
+
+    Pages of a site share its template, navigation and footer, so when the home page itself matches the
+    error page, the fingerprint cannot tell pages apart and detection is disabled for the host.
+    """
+
+    MIN_SIMILARITY = 0.85
+
+    def __init__(self, latency_tracker: LatencyTracker):
+        """
+        Args:
+            latency_tracker: Bounds the probe requests like every other request of the crawl.
+        """
+        self.latency_tracker = latency_tracker
+        self.baselines: Dict[str, Optional[HostBaseline]] = dict()
+        self.host_locks = defaultdict(threading.Lock)
+
+    def _probe(self, scheme: str, host: str, session: requests.Session) -> Optional[HostBaseline]:
+        probe_url = f"{scheme}://{host}/{uuid.uuid4().hex}"
+        try:
+            response = timed_request(session, "GET", probe_url, self.latency_tracker, verify=False,
+                                     allow_redirects=True)
+        except requests.exceptions.RequestException as e:
+            logger.debug(f'Soft 404 probe of {host} failed: {e}')
+            return None
+
+        if response.status_code != 200 or not response.headers.get("Content-Type", "").startswith("text/html"):
+            logger.debug(f'{host} reports missing pages properly (status {response.status_code}).')
+            return None
+
+        logger.debug(f'{host} answers missing pages with status 200, landing on {response.url}.')
+        baseline = HostBaseline(minhash(page_text(response.text)), response.url, bool(response.history))
+        if not baseline.redirected and self._matches_home_page(scheme, host, baseline, session):
+            logger.debug(f'The error page of {host} is similar to its home page, soft 404 detection is disabled.')
+            return None
+        return baseline
+
+    def _matches_home_page(self, scheme: str, host: str, baseline: HostBaseline, session: requests.Session) -> bool:
+        try:
+            response = timed_request(session, "GET", f"{scheme}://{host}/", self.latency_tracker, verify=False,
+                                     allow_redirects=True)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.debug(f'Home page of {host} could not be fetched: {e}')
+            return False
+        return similarity(minhash(page_text(response.text)), baseline.fingerprint) >= self.MIN_SIMILARITY
+
+    def get_baseline(self, url: str, session: requests.Session) -> Optional[HostBaseline]:
+        parsed = urlparse(url)
+        host = parsed.netloc
+        if host not in self.baselines:
+            with self.host_locks[host]:
+                if host not in self.baselines:
+                    self.baselines[host] = self._probe(parsed.scheme, host, session)
+        return self.baselines[host]
+
+    def is_soft_404(self, url: str, response: requests.Response, session: requests.Session,
+                    redirected: bool = False) -> bool:
+        """
+        Check whether a successfully fetched page is actually the error page of its host.
+
+        Args:
+            url: The requested URL.
+            response: The response of the page.
+            session: Session used for the one-time probe of the host.
+            redirected: Whether the URL was redirected before the response was requested, from the URL it led to.
+
+        Returns:
+            True if the page matches the host's error page.
+        """
+        baseline = self.get_baseline(url, session)
+        if baseline is None or url == baseline.landing_url:
+            return False
+
+        if baseline.redirected:
+            # The host redirects missing pages, e.g. to its home page, so the fingerprint is not of an error page.
+            return (redirected or bool(response.history)) and response.url == baseline.landing_url
+
+        return similarity(minhash(page_text(response.text)), baseline.fingerprint) >= self.MIN_SIMILARITY
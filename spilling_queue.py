@@ -0,0 +1,88 @@
+import pickle
+import tempfile
+from collections import deque
+from typing import Any, Optional
+
+from loguru import logger
+
+from batch_queue import BatchQueue
+
+
+class SpillingQueue(BatchQueue):
+    """
+    A FIFO queue that keeps a bounded hot window in memory and spills the overflow to disk.
+
+    Items are appended to an append-only segment file once the hot window is full, and read back
+    in batches when the hot window runs dry. While anything is on disk, new items are spilled as
+    well, so the overall FIFO order is preserved.
+    """
+
+    def __init__(self, hot_size: int = 10000, batch_size: int = 1000, spill_dir: Optional[str] = None):
+        """
+        Initialize the queue.
+
+        Args:
+            hot_size: Maximum number of items kept in memory.
+            batch_size: Number of items read back from disk on each refill.
+            spill_dir: Directory for the segment file. Defaults to the system temp directory.
+        """
+        self.hot_size = max(1, hot_size)
+        self.batch_size = max(1, min(batch_size, self.hot_size))
+        self.spill_dir = spill_dir
+        super().__init__()
+
+    def _init(self, maxsize: int) -> None:
+        self._hot: deque = deque()
+        self._segment = None
+        self._read_pos = 0
+        self._write_pos = 0
+        self._spilled = 0
+
+    def _qsize(self) -> int:
+        return len(self._hot) + self._spilled
+
+    def _put(self, item: Any) -> None:
+        if not self._spilled and len(self._hot) < self.hot_size:
+            self._hot.append(item)
+        else:
+            self._spill(item)
+
+    def _get(self) -> Any:
+        if not self._hot:
+            self._refill()
+        return self._hot.popleft()
+
+    def _spill(self, item: Any) -> None:
+        if self._segment is None:
+            self._segment = tempfile.TemporaryFile(prefix="blc_frontier_", suffix=".seg", dir=self.spill_dir)
+            logger.debug(f"Frontier exceeded {self.hot_size} items, spilling to disk.")
+        self._segment.seek(self._write_pos)
+        pickle.dump(item, self._segment, protocol=pickle.HIGHEST_PROTOCOL)
+        self._write_pos = self._segment.tell()
+        self._spilled += 1
+
+    def _refill(self) -> None:
+        self._segment.flush()
+        self._segment.seek(self._read_pos)
+        for _ in range(min(self.batch_size, self._spilled)):
+            self._hot.append(pickle.load(self._segment))
+            self._spilled -= 1
+        self._read_pos = self._segment.tell()
+
+        if not self._spilled:
+            # Everything on disk was consumed; reclaim the space and start a fresh segment.
+            self._segment.seek(0)
+            self._segment.truncate()
+            self._read_pos = self._write_pos = 0
+
+    def get_spilled_num(self) -> int:
+        """Return the number of items currently stored on disk."""
+        with self.mutex:
+            return self._spilled
+
+    def close(self) -> None:
+        """Release the segment file."""
+        with self.mutex:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
@@ -0,0 +1,52 @@
+import threading
+from typing import Any, Iterable, List
+
+
+class StripedSet:
+    """
+    A thread-safe set split into stripes, each guarded by its own lock.
+
+    Threads adding items that fall into different stripes do not contend, and items that are already
+    in the set are filtered out without taking any lock.
+    """
+
+    DEFAULT_STRIPES_NUM = 64
+
+    def __init__(self, items: Iterable[Any] = (), stripes_num: int = DEFAULT_STRIPES_NUM):
+        self.stripes_num = stripes_num
+        self.stripes: List[set] = [set() for _ in range(stripes_num)]
+        self.locks = [threading.Lock() for _ in range(stripes_num)]
+        self.add_new(items)
+
+    def add_new(self, items: Iterable[Any]) -> List[Any]:
+        """
+        Add items to the set.
+
+        Args:
+            items: Items to add.
+
+        Returns:
+            The items that were not in the set before, in their original order.
+        """
+        new_items = []
+        for item in items:
+            stripe_index = hash(item) % self.stripes_num
+            stripe = self.stripes[stripe_index]
+            # Most items are already known, check them without taking the lock first.
+            if item in stripe:
+                continue
+            with self.locks[stripe_index]:
+                if item in stripe:
+                    continue
+                stripe.add(item)
+            new_items.append(item)
+        return new_items
+
+    def __contains__(self, item: Any) -> bool:
+        stripe_index = hash(item) % self.stripes_num
+        with self.locks[stripe_index]:
+            return item in self.stripes[stripe_index]
+
+    def __len__(self) -> int:
+        """Return the number of items without locking, exact only while no thread is adding items."""
+        return sum(len(stripe) for stripe in self.stripes)
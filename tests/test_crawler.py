@@ -0,0 +1,99 @@
+"""
+Tests of the crawl of a local website by Crawler.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import Crawler  # noqa: E402
+from crawler_resources import CrawlerResources  # noqa: E402
+from link import Link, LinkStatus  # noqa: E402
+
+PAGES = {
+    "/": '<a href="/a">A</a> <a href="https://example.com/">External</a>',
+    "/a": '<a href="/missing">Missing</a>',
+}
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves PAGES on 127.0.0.1, any other host name is redirected to it."""
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        self._respond(with_body=False)
+
+    def do_GET(self) -> None:
+        self._respond(with_body=True)
+
+    def _respond(self, with_body: bool) -> None:
+        host, port = self.server.server_address
+        if self.headers["Host"] != f"{host}:{port}":
+            self.send_response(301)
+            self.send_header("Location", f"http://{host}:{port}{self.path}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = PAGES.get(self.path)
+        data = (body if body is not None else "Not found").encode()
+        self.send_response(200 if body is not None else 404)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(data)
+
+
+@pytest.fixture
+def site_port():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_links_of_a_redirecting_target_are_internal(site_port):
+    target_url = f"http://localhost:{site_port}/"
+    crawler = Crawler(target_url, -1)
+    links = {link.url: link for link in crawler.process(Link(target_url, 0, target_url))}
+
+    internal = links[f"http://127.0.0.1:{site_port}/a"]
+    assert internal.depth == 1
+    assert links["https://example.com/"].depth == crawler.max_depth
+
+    found = crawler.process(internal)
+    assert [(link.url, link.depth) for link in found] == [(f"http://127.0.0.1:{site_port}/missing", 2)]
+
+
+def test_each_finding_of_a_link_is_kept():
+    crawler = Crawler("https://a.com/", -1)
+    link = Link("http://a.com/page", 1, "https://a.com/", redirect_chain=["http://a.com/page", "https://a.com/page"])
+    crawler.add_error_to_report(link, LinkStatus.HTTP_INSTEAD_OF_HTTPS)
+    crawler.add_error_to_report(link, LinkStatus.SOFT_404)
+
+    findings = [(found.url, found.status, found.redirect_chain) for found in crawler.get_broken_links()]
+    assert findings == [("http://a.com/page", LinkStatus.HTTP_INSTEAD_OF_HTTPS, link.redirect_chain),
+                        ("http://a.com/page", LinkStatus.SOFT_404, link.redirect_chain)]
+
+
+def test_external_link_outcome_is_shared_by_crawls(site_port):
+    resources = CrawlerResources()
+    outcomes = []
+    for _ in range(2):
+        crawler = Crawler("https://a.com/", -1, resources)
+        for path in ("/a", "/missing"):
+            crawler.process(Link(f"http://127.0.0.1:{site_port}{path}", 1, "https://a.com/"))
+        outcomes.append([(link.url, link.status) for link in crawler.get_broken_links()])
+
+    assert outcomes[0] == outcomes[1] == [(f"http://127.0.0.1:{site_port}/missing", LinkStatus.NO_SUCH_PAGE)]
+    assert resources.external_link_cache.get_stats()["hits"] == 2
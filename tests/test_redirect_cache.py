@@ -0,0 +1,103 @@
+"""
+Tests of the redirect rules learned by RedirectCache.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redirect_cache import RedirectCache  # noqa: E402
+
+
+def learn(cache: RedirectCache, *chains: list[str]) -> None:
+    for chain in chains:
+        cache.record(chain)
+
+
+def test_scheme_change_is_generalized_once_verified():
+    cache = RedirectCache()
+    learn(cache, ["http://a.com/x", "https://a.com/x"], ["http://a.com/y", "https://a.com/y"])
+    assert cache.resolve("http://a.com/z") is None
+
+    cache.record(["http://a.com/z", "https://a.com/z"])
+    assert cache.resolve("http://a.com/other/page") == ["http://a.com/other/page", "https://a.com/other/page"]
+
+
+def test_rule_is_not_applied_before_it_is_verified():
+    cache = RedirectCache()
+    learn(cache, ["https://a.com/old/a", "https://a.com/new/a"], ["https://a.com/old/b", "https://a.com/new/b"])
+    assert cache.resolve("https://a.com/old/c") is None
+    assert cache.get_stats()["rules"] == 0
+
+
+def test_contradicted_rule_is_never_applied():
+    cache = RedirectCache()
+    learn(cache, ["https://a.com/old/a", "https://a.com/new/a"], ["https://a.com/old/b", "https://a.com/new/b"])
+    # The next URL under the prefix did not redirect.
+    cache.record(["https://a.com/old/c"])
+    cache.record(["https://a.com/old/d", "https://a.com/new/d"])
+    assert cache.resolve("https://a.com/old/e") is None
+
+
+def test_path_prefix_of_one_segment_is_generalized():
+    cache = RedirectCache()
+    learn(cache, ["https://a.com/old/a", "https://a.com/new/a"], ["https://a.com/old/b", "https://a.com/new/b"],
+          ["https://a.com/old/c/d", "https://a.com/new/c/d"])
+    assert cache.resolve("https://a.com/old/e") == ["https://a.com/old/e", "https://a.com/new/e"]
+
+
+def test_redirect_to_a_target_with_query_is_not_generalized():
+    cache = RedirectCache()
+    learn(cache, ["https://a.com/account/settings", "https://a.com/login?next=/account/settings"],
+          ["https://a.com/account/billing", "https://a.com/login?next=/account/billing"],
+          ["https://a.com/account/orders", "https://a.com/login?next=/account/orders"])
+    assert cache.resolve("https://a.com/blog/post-1") is None
+    assert cache.resolve("https://a.com/account/profile") is None
+
+
+def test_site_root_path_change_is_not_generalized():
+    cache = RedirectCache()
+    learn(cache, ["https://a.com/", "https://a.com/en/"], ["https://a.com/about", "https://a.com/en/about"],
+          ["https://a.com/team", "https://a.com/en/team"])
+    assert cache.resolve("https://a.com/en/contact") is None
+    assert cache.resolve("https://a.com/contact") is None
+
+
+def test_target_under_the_source_prefix_is_not_generalized():
+    cache = RedirectCache()
+    learn(cache, ["https://a.com/docs/a", "https://a.com/docs/v2/a"],
+          ["https://a.com/docs/b", "https://a.com/docs/v2/b"],
+          ["https://a.com/docs/c", "https://a.com/docs/v2/c"])
+    assert cache.resolve("https://a.com/docs/v2/d") is None
+
+
+def test_most_specific_prefix_is_checked_first():
+    cache = RedirectCache()
+    learn(cache, ["https://a.com/docs/a", "https://docs.a.com/a"], ["https://a.com/docs/b", "https://docs.a.com/b"],
+          ["https://a.com/docs/c", "https://docs.a.com/c"])
+    learn(cache, ["https://a.com/docs/v1/a", "https://a.com/legacy/a"],
+          ["https://a.com/docs/v1/b", "https://a.com/legacy/b"],
+          ["https://a.com/docs/v1/c", "https://a.com/legacy/c"])
+    assert cache.resolve("https://a.com/docs/v1/d") == ["https://a.com/docs/v1/d", "https://a.com/legacy/d"]
+    assert cache.resolve("https://a.com/docs/d") == ["https://a.com/docs/d", "https://docs.a.com/d"]
+
+
+def test_observed_chain_is_returned_for_its_url():
+    cache = RedirectCache()
+    cache.record(["https://a.com/account/settings", "https://a.com/login?next=/account/settings"])
+    assert cache.resolve("https://a.com/account/settings") == [
+        "https://a.com/account/settings", "https://a.com/login?next=/account/settings"]
+
+
+def test_url_without_scheme_or_host_is_not_resolved():
+    cache = RedirectCache()
+    learn(cache, ["http://a.com/x", "https://a.com/x"], ["http://a.com/y", "https://a.com/y"],
+          ["http://a.com/z", "https://a.com/z"])
+    for url in ("x", "", "a.com/x", "http:/x", "//a.com/x"):
+        assert cache.resolve(url) is None
+        cache.record([url])
+        cache.record([url, "https://a.com/x"])
+    assert cache.resolve("http://a.com/w") == ["http://a.com/w", "https://a.com/w"]
@@ -0,0 +1,26 @@
+"""
+Tests of the non-crawling lists loaded by UrlFilter.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_filter import UrlFilter  # noqa: E402
+
+
+def test_invalid_patterns_are_skipped(tmp_path):
+    path = tmp_path / "non_crawling.json"
+    path.write_text(json.dumps({"domains": ["blocked.com"], "exclude_patterns": ["/login", "[unclosed", "(?i)/x"],
+                                "include_patterns": ["/login/help", "(b"]}))
+    url_filter = UrlFilter.from_files([str(path)])
+
+    assert url_filter.exclude_patterns == ["/login"]
+    assert url_filter.include_patterns == ["/login/help"]
+    assert url_filter.is_excluded("https://a.com/login")
+    assert not url_filter.is_excluded("https://a.com/login/help")
+    assert url_filter.is_excluded("https://blocked.com/")
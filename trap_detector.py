@@ -0,0 +1,105 @@
+import hashlib
+import re
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qsl
+
+# A path segment made only of an identifier: a UUID, a hash or a long token containing digits.
+ID_SEGMENT = re.compile(r"^(?:[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}|(?=\w*\d)\w{16,})$")
+DIGITS = re.compile(r"\d+")
+
+
+def url_template(url: str) -> Tuple[str, str]:
+    """
+    Collapse a URL to the templates it was probably generated from.
+
+    Numbers in path segments become {n} and identifier segments become {id}. Query parameter values are dropped
+    and the parameter names are sorted, so all the permutations of a faceted search share a template.
+
+    Args:
+        url: The URL.
+
+    Returns:
+        The path template, without the query, and the full template, with the query parameter names.
+    """
+    parsed = urlparse(url)
+    segments = ["{id}" if ID_SEGMENT.match(segment) else DIGITS.sub("{n}", segment)
+                for segment in parsed.path.split("/")]
+    path_template = parsed.netloc + "/".join(segments)
+    names = sorted({name for name, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    return path_template, path_template + "?" + "&".join(names) if names else path_template
+
+
+def sample_point(url: str) -> float:
+    """Map a URL to a stable point in [0, 1), the same URL is sampled the same way in every crawl."""
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), "big") / 2 ** 64
+
+
+class TrapDetector:
+    """
+    Detect crawler traps, such as calendars, faceted search and session ids, that generate endless unique URLs.
+
+    New URLs are grouped by template. The pages of a template are all parsed up to its budget, after that they
+    are sampled with a probability of budget / URLs seen, so the number of parsed pages only grows with the
+    logarithm of the URLs a trap generates and the crawl ends. The permutations of query parameters of a path
+    share a larger budget, and an optional budget per host is never exceeded. URLs that are not sampled are
+    suppressed: the crawler still checks them but does not parse them.
+    """
+
+    DEFAULT_MAX_URLS_PER_PATTERN = 1000
+    QUERY_VARIANTS_FACTOR = 4
+    TOP_PATTERNS = 10
+
+    def __init__(self, max_urls_per_pattern: int = DEFAULT_MAX_URLS_PER_PATTERN,
+                 max_urls_per_host: Optional[int] = None):
+        """
+        Args:
+            max_urls_per_pattern: Number of pages of a template parsed before sampling it.
+            max_urls_per_host: If set, maximum number of pages parsed on a host.
+        """
+        self.max_urls_per_pattern = max_urls_per_pattern
+        self.max_urls_per_path = max_urls_per_pattern * self.QUERY_VARIANTS_FACTOR
+        self.max_urls_per_host = max_urls_per_host
+        self.pattern_counts: Counter = Counter()
+        self.path_counts: Counter = Counter()
+        self.host_counts: Counter = Counter()
+        self.suppressed: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def admit(self, url: str) -> bool:
+        """
+        Decide whether the page of a new URL should be parsed, each URL must be checked only once.
+
+        Args:
+            url: The URL, normalized.
+
+        Returns:
+            False if the URL belongs to a template or host over budget and was not sampled.
+        """
+        host = urlparse(url).netloc
+        path_template, pattern = url_template(url)
+        with self.lock:
+            self.pattern_counts[pattern] += 1
+            self.path_counts[path_template] += 1
+            probability = min(self.max_urls_per_pattern / self.pattern_counts[pattern],
+                              self.max_urls_per_path / self.path_counts[path_template])
+            if self.max_urls_per_host is not None and self.host_counts[host] >= self.max_urls_per_host:
+                admitted = False
+            else:
+                admitted = probability >= 1 or sample_point(url) < probability
+            if admitted:
+                self.host_counts[host] += 1
+            else:
+                self.suppressed[pattern] += 1
+            return admitted
+
+    def get_suppressed(self) -> Dict[str, int]:
+        """Return the number of suppressed URLs of the TOP_PATTERNS most suppressed templates."""
+        with self.lock:
+            return dict(self.suppressed.most_common(self.TOP_PATTERNS))
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"patterns": len(self.pattern_counts), "suppressed_patterns": len(self.suppressed),
+                    "suppressed_urls": sum(self.suppressed.values())}
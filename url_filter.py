@@ -0,0 +1,139 @@
+import json
+import re
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+
+
+class DomainTrie:
+    """A suffix trie over reversed domain labels, matching a domain and all of its subdomains."""
+
+    _END = None
+
+    def __init__(self, domains: Iterable[str] = ()):
+        self.root: dict = dict()
+        self.size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def add(self, domain: str) -> None:
+        labels = domain.strip().strip(".").lower().split(".")
+        if labels == [""]:
+            return
+        node = self.root
+        for label in reversed(labels):
+            node = node.setdefault(label, dict())
+        if self._END not in node:
+            node[self._END] = True
+            self.size += 1
+
+    def matches(self, hostname: str) -> bool:
+        """
+        Check whether a hostname is one of the domains or a subdomain of one of them.
+
+        Args:
+            hostname: The hostname to look up.
+
+        Returns:
+            True if the hostname is covered by the trie.
+        """
+        node = self.root
+        for label in reversed(hostname.rstrip(".").lower().split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+
+class UrlFilter:
+    """
+    A precompiled matcher for URLs that should not be crawled.
+
+    A URL is excluded if its hostname is covered by a blocked domain or it matches an exclude pattern,
+    unless it also matches an include pattern. All patterns are combined into one regex per list.
+    """
+
+    def __init__(self, domains: Iterable[str] = (), exclude_patterns: Iterable[str] = (),
+                 include_patterns: Iterable[str] = ()):
+        self.domains = DomainTrie(domains)
+        self.exclude_patterns = list(exclude_patterns)
+        self.include_patterns = list(include_patterns)
+        self.exclude_regex = self._compile(self.exclude_patterns)
+        self.include_regex = self._compile(self.include_patterns)
+
+    @staticmethod
+    def _compile(patterns: List[str]) -> Optional[re.Pattern]:
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+    @staticmethod
+    def _valid_patterns(patterns: List[str], path: str) -> List[str]:
+        """Return the patterns that compile, the others are skipped with a warning."""
+        valid = []
+        for pattern in patterns:
+            try:
+                # Compiled as it is combined with the other patterns.
+                re.compile(f"(?:{pattern})")
+                valid.append(pattern)
+            except (re.error, TypeError) as e:
+                logger.warning(f"Skipping invalid pattern {pattern!r} in non-crawling list {path}: {e}")
+        return valid
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> "UrlFilter":
+        """
+        Load a filter from JSON files and plain text domain lists.
+
+        JSON files may contain "domains", "exclude_patterns" and "include_patterns" lists.
+        Any other file is read as one domain per line, ignoring blank lines and '#' comments.
+
+        Args:
+            paths: Files to load, missing or invalid files and invalid patterns are skipped with a warning.
+
+        Returns:
+            A filter combining all the files.
+        """
+        domains: List[str] = []
+        exclude_patterns: List[str] = []
+        include_patterns: List[str] = []
+
+        for path in paths:
+            try:
+                with open(path, 'r', encoding="utf-8") as f:
+                    if path.endswith(".json"):
+                        data = json.load(f)
+                        domains.extend(data.get('domains', []))
+                        exclude_patterns.extend(cls._valid_patterns(data.get('exclude_patterns', []), path))
+                        include_patterns.extend(cls._valid_patterns(data.get('include_patterns', []), path))
+                    else:
+                        for line in f:
+                            line = line.split("#", 1)[0].strip()
+                            if line:
+                                domains.append(line)
+            except Exception as e:
+                logger.warning(f"Could not load non-crawling list {path}: {e}")
+
+        url_filter = cls(domains, exclude_patterns, include_patterns)
+        logger.debug(f"Loaded {url_filter.domains.size} non-crawling domains, {len(exclude_patterns)} exclude "
+                     f"and {len(include_patterns)} include patterns.")
+        return url_filter
+
+    def is_excluded(self, url: str) -> bool:
+        """
+        Check whether a URL should not be crawled.
+
+        Args:
+            url: The URL to check.
+
+        Returns:
+            True if the URL is excluded.
+        """
+        hostname = urlparse(url).hostname or ""
+        excluded = self.domains.matches(hostname) or bool(self.exclude_regex and self.exclude_regex.search(url))
+        if excluded and self.include_regex and self.include_regex.search(url):
+            return False
+        return excluded
@@ -1,14 +1,26 @@
-import queue
 import threading
-from typing import Any
+import time
+from typing import Any, Callable, Iterable, Optional
 
 from loguru import logger
 
+from batch_queue import BatchQueue
+from priority_frontier import PriorityFrontier
+from spilling_queue import SpillingQueue
+from striped_set import StripedSet
+
 
 class WorkerManager:
     """Manages a pool of threads to process tasks concurrently."""
 
-    def __init__(self, first_task: Any, processor: Any, threads_num: int, repeat_task: bool = True):
+    DEFAULT_QUEUE_MEMORY_SIZE = 10000
+
+    def __init__(self, first_task: Any, processor: Any, threads_num: int, repeat_task: bool = True,
+                 queue_memory_size: int = DEFAULT_QUEUE_MEMORY_SIZE,
+                 priority_fn: Optional[Callable[[Any, int], tuple]] = None,
+                 max_time: Optional[float] = None, max_requests: Optional[int] = None,
+                 initial_tasks: Iterable[Any] = (),
+                 new_task_fn: Optional[Callable[[Any], None]] = None):
         """
         Initialize the worker manager.
 
@@ -17,22 +29,34 @@ class WorkerManager:
             processor: An object with a `process(task)` method.
             threads_num: Number of worker threads.
             repeat_task: Whether to repeatedly reprocess the same tasks.
+            queue_memory_size: Maximum number of pending tasks kept in memory, the rest are spilled to disk.
+            priority_fn: If set, tasks are processed by priority instead of FIFO, see PriorityFrontier.
+            max_time: If set, stop processing tasks after this number of seconds.
+            max_requests: If set, stop processing tasks after this number of tasks.
+            initial_tasks: More tasks to start with, after the first one.
+            new_task_fn: If set, called once for every new task before it is queued, it may update the task.
         """
         self.first_task = first_task
         self.processor = processor
         self.threads_num = threads_num
         self.repeat_task = repeat_task
         self.threads: list[threading.Thread] = []
-        self.task_queue: queue.Queue = queue.Queue()
-
-        if not repeat_task:
-            self.all_tasks_to_process: set = {first_task}
-            self.all_tasks_to_process_lock = threading.Lock()
-
-        self.processed_counter: int = 0
-        self.processed_counter_lock = threading.Lock()
-
-    def worker(self) -> None:
+        self.task_queue: BatchQueue = (PriorityFrontier(priority_fn) if priority_fn
+                                       else SpillingQueue(hot_size=queue_memory_size))
+        self.max_time = max_time
+        self.max_requests = max_requests
+        self.new_task_fn = new_task_fn
+        self.start_time = 0.0
+        self.budget_exhausted = False
+
+        self.all_tasks_to_process: StripedSet = StripedSet([first_task])
+        self.initial_tasks = self.all_tasks_to_process.add_new(initial_tasks)
+
+        # Each worker only increments its own slot, so no lock is needed. Readers get an approximate sum.
+        self.processed_counters: list[int] = [0] * threads_num
+        self.skipped_counters: list[int] = [0] * threads_num
+
+    def worker(self, worker_index: int) -> None:
         """Thread function for processing tasks from the queue."""
         logger.debug("Starting")
         self.processor.initiate()
@@ -43,9 +67,14 @@ class WorkerManager:
                 self.task_queue.task_done()
                 break
 
+            if self.is_budget_exhausted():
+                # Drain the queue without processing so that join() returns.
+                self.skipped_counters[worker_index] += 1
+                self.task_queue.task_done()
+                continue
+
             try:
-                with self.processed_counter_lock:
-                    self.processed_counter += 1
+                self.processed_counters[worker_index] += 1
                 new_tasks = self.processor.process(task)
             except Exception as e:
                 logger.error(f"Error: {e}")
@@ -53,12 +82,14 @@ class WorkerManager:
                 continue
 
             if not self.repeat_task:
-                for task in new_tasks:
-                    with self.all_tasks_to_process_lock:
-                        if task in self.all_tasks_to_process:
-                            continue
-                        self.all_tasks_to_process.add(task)
-                    self.task_queue.put(task)
+                tasks_to_queue = self.all_tasks_to_process.add_new(new_tasks)
+                if self.new_task_fn:
+                    for new_task in tasks_to_queue:
+                        self.new_task_fn(new_task)
+                self.task_queue.put_many(tasks_to_queue)
+                if isinstance(self.task_queue, PriorityFrontier):
+                    queued = set(tasks_to_queue)
+                    self.task_queue.note_sightings(task for task in new_tasks if task not in queued)
             else:
                 self.task_queue.put(task)
 
@@ -68,11 +99,13 @@ class WorkerManager:
         logger.debug("Finished")
 
     def start(self) -> None:
-        """Start the worker threads and add the first task to the queue."""
+        """Start the worker threads and add the first tasks to the queue."""
         logger.debug("Work is starting.")
+        self.start_time = time.monotonic()
         self.task_queue.put(self.first_task)
+        self.task_queue.put_many(self.initial_tasks)
         for i in range(self.threads_num):
-            t = threading.Thread(target=self.worker, name=f"Worker-{i + 1}")
+            t = threading.Thread(target=self.worker, args=(i,), name=f"Worker-{i + 1}")
             t.start()
             self.threads.append(t)
 
@@ -83,14 +116,33 @@ class WorkerManager:
             self.task_queue.put(None)
         for t in self.threads:
             t.join()
+        self.task_queue.close()
         logger.info(f"{len(self.all_tasks_to_process)} tasks were processed.")
 
+    def is_budget_exhausted(self) -> bool:
+        """Return whether the time or tasks budget was used up."""
+        if not self.budget_exhausted:
+            if self.max_time is not None and time.monotonic() - self.start_time >= self.max_time:
+                logger.warning(f"Time budget of {self.max_time} seconds exhausted, stopping.")
+                self.budget_exhausted = True
+            elif self.max_requests is not None and self.get_processed_num() >= self.max_requests:
+                logger.warning(f"Budget of {self.max_requests} requests exhausted, stopping.")
+                self.budget_exhausted = True
+        return self.budget_exhausted
+
+    def stop(self) -> None:
+        """Stop processing tasks as if the budget was exhausted, pending tasks are drained."""
+        logger.info("Stop was requested.")
+        self.budget_exhausted = True
+
+    def get_skipped_num(self) -> int:
+        """Return the number of tasks left unprocessed because the budget was exhausted."""
+        return sum(self.skipped_counters)
+
     def get_tasks_num(self) -> int:
-        """Return the number of unique tasks seen."""
-        with self.all_tasks_to_process_lock:
-            return len(self.all_tasks_to_process)
+        """Return the number of unique tasks seen, approximate while the workers are running."""
+        return len(self.all_tasks_to_process)
 
     def get_processed_num(self) -> int:
-        """Return the number of tasks that have been processed."""
-        with self.processed_counter_lock:
-            return self.processed_counter
+        """Return the number of tasks that have been processed, approximate while the workers are running."""
+        return sum(self.processed_counters)